@@ -3,53 +3,17 @@ import streamlit as st
 
 st.set_page_config(page_title="Rastreador de ETFs", layout="wide")
 
-# Importaciones necesarias
-import pandas as pd
+# Importaciones necesarias; NumPy, pandas y las funciones de análisis se importan al iniciar sesión
+import time
 from datetime import datetime
-from functionsappa import (
-    get_etf_data, calculate_metrics, plot_performance,
-    plot_comparative_performance, get_sector_allocation,
-    plot_sector_allocation, plot_correlation_heatmap, validate_data,
-    plot_monetary_returns_pie, simulate_long_term_growth
-)
-from user_management import load_users, save_user, hash_password, authenticate_user, user_exists
-import matplotlib.pyplot as plt
-
-# Diccionario con descripciones para los ETFs
-etf_descriptions = {
-    "FXI": "iShares China Large-Cap ETF (Empresas chinas grandes)",
-    "EWT": "iShares MSCI Taiwan ETF (Mercado taiwanés)",
-    "IWM": "iShares Russell 2000 ETF (Empresas estadounidenses pequeñas)",
-    "EWZ": "iShares MSCI Brazil ETF (Mercado brasileño)",
-    "EWU": "iShares MSCI United Kingdom ETF (Mercado del Reino Unido)",
-    "XLF": "Financial Select Sector SPDR Fund (Sector financiero estadounidense)",
-    "BKF": "iShares MSCI BRIC ETF (Mercados emergentes: Brasil, Rusia, India, China)",
-    "EWY": "iShares MSCI South Korea ETF (Mercado surcoreano)",
-    "AGG": "iShares Core U.S. Aggregate Bond ETF (Bonos agregados de EE.UU.)",
-    "EEM": "iShares MSCI Emerging Markets ETF (Mercados emergentes)",
-    "EZU": "iShares MSCI Eurozone ETF (Zona Euro)",
-    "GLD": "SPDR Gold Trust (Oro)",
-    "QQQ": "Invesco QQQ Trust (NASDAQ 100, tecnología estadounidense)",
-    "AAXJ": "iShares MSCI All Country Asia ex Japan ETF (Asia excluyendo Japón)",
-    "SHY": "iShares 1-3 Year Treasury Bond ETF (Bonos del tesoro a corto plazo)",
-    "ACWI": "iShares MSCI ACWI ETF (Mercados globales desarrollados y emergentes)",
-    "SLV": "iShares Silver Trust (Plata)",
-    "EWH": "iShares MSCI Hong Kong ETF (Mercado de Hong Kong)",
-    "SPY": "SPDR S&P 500 ETF Trust (S&P 500, mercado estadounidense)",
-    "EWJ": "iShares MSCI Japan ETF (Mercado japonés)",
-    "IBGL": "iShares International Treasury Bond ETF (Bonos internacionales)",
-    "DIA": "SPDR Dow Jones Industrial Average ETF Trust (Dow Jones)",
-    "EWQ": "iShares MSCI France ETF (Mercado francés)",
-    "XOP": "SPDR S&P Oil & Gas Exploration & Production ETF (Exploración y producción de petróleo y gas)",
-    "VWO": "Vanguard FTSE Emerging Markets ETF (Mercados emergentes)",
-    "EWA": "iShares MSCI Australia ETF (Mercado australiano)",
-    "EWC": "iShares MSCI Canada ETF (Mercado canadiense)",
-    "ILF": "iShares Latin America 40 ETF (Mercado latinoamericano)",
-    "XLV": "Health Care Select Sector SPDR Fund (Sector salud estadounidense)",
-    "EWG": "iShares MSCI Germany ETF (Mercado alemán)",
-    "ITB": "iShares U.S. Home Construction ETF (Construcción de viviendas en EE.UU.)"
-}
+from etf_catalog import etf_descriptions
+import instrumentation
+from user_management import save_user, hash_password, authenticate_user, user_exists, get_user_id
+from user_portfolios import DEFAULT_PORTFOLIO, save_portfolio, load_portfolios
+from warmup import start_warmup, wait_for_imports
 
+# Inicio de la ejecución, para medir la latencia de cada interacción
+inicio_ejecucion = time.perf_counter()
 
 # Mostrar logo
 st.image(r"C:\Users\Goldenton\Desktop\M3Y\CODE\AllianzPatrimonial\allianzlogo.png", width=150)
@@ -59,57 +23,73 @@ if "authenticated" not in st.session_state:
     st.session_state["authenticated"] = False
 if "username" not in st.session_state:
     st.session_state["username"] = ""
+if "tickers_seleccionados" not in st.session_state:
+    st.session_state["tickers_seleccionados"] = ["FXI", "SPY"]
+if "monto_inversion" not in st.session_state:
+    st.session_state["monto_inversion"] = 10000.0
+if "latencias" not in st.session_state:
+    st.session_state["latencias"] = {}
+
+# Aplicar una cartera guardada a la selección de ETFs y a los sliders
+def apply_portfolio(allocations):
+    st.session_state["tickers_seleccionados"] = list(allocations)
+    for ticker, allocation in allocations.items():
+        st.session_state[f"slider_{ticker}"] = int(round(allocation))
+
+# Aplicar una cartera sugerida por el optimizador solo a los sliders (no cambia la selección de ETFs)
+def apply_suggested(allocations):
+    for ticker, allocation in allocations.items():
+        st.session_state[f"slider_{ticker}"] = allocation
 
 # Función para cerrar sesión
 def logout():
     st.session_state["authenticated"] = False
     st.session_state["username"] = ""
 
-# Interfaz de inicio de sesión/registro
-if not st.session_state["authenticated"]:
-    st.sidebar.title("Inicio de Sesión")
-    menu = st.sidebar.radio("Selecciona una opción", ["Iniciar Sesión", "Registrarse"])
-
-    if menu == "Registrarse":
-        st.title("Registro")
-        new_username = st.text_input("Elige un nombre de usuario")
-        new_password = st.text_input("Elige una contraseña", type="password")
-        confirm_password = st.text_input("Confirma tu contraseña", type="password")
-
-        if st.button("Registrar"):
-            if new_password != confirm_password:
-                st.error("¡Las contraseñas no coinciden!")
-            elif user_exists(new_username):
-                st.error("¡El nombre de usuario ya existe! Por favor elige otro.")
-            else:
-                save_user(new_username, hash_password(new_password))
-                st.success("¡Usuario registrado exitosamente! Ahora inicia sesión.")
-
-    elif menu == "Iniciar Sesión":
-        st.title("Iniciar Sesión")
-        username = st.text_input("Usuario")
-        password = st.text_input("Contraseña", type="password")
+# Streamlit descarta el estado de los widgets que no se dibujan en una ejecución;
+# reasignarlo conserva la cartera mientras el usuario está en otra sección
+def keep_portfolio_state():
+    for key in list(st.session_state):
+        if key.startswith("slider_") or key == "monto_inversion":
+            st.session_state[key] = st.session_state[key]
+
+# Guardar la latencia (ms) de la última ejecución de cada sección o fragmento
+def record_latency(alcance, inicio):
+    latencia = (time.perf_counter() - inicio) * 1000
+    st.session_state["latencias"][alcance] = latencia
+    return latencia
+
+
+# Panel de depuración (solo en la sesión que abrió ?debug=1): tiempos, llamadas y cachés del proceso
+def debug_panel():
+    with st.sidebar.expander("Perfil de rendimiento"):
+        # Las mediciones son de todo el proceso: se activan con ETF_PROFILE=1 o desde aquí
+        if instrumentation.is_enabled():
+            st.button("Desactivar mediciones", on_click=instrumentation.disable)
+        else:
+            st.caption("Mediciones desactivadas (ETF_PROFILE=1 las activa al arrancar).")
+            st.button("Activar mediciones", on_click=instrumentation.enable)
+        reporte = instrumentation.report()
+        if reporte:
+            st.dataframe(pd.DataFrame(reporte).set_index("name").style.format(
+                {"total_ms": "{:,.1f}", "mean_ms": "{:,.2f}", "max_ms": "{:,.1f}"}
+            ))
+        else:
+            st.caption("Aún no hay mediciones.")
+        st.download_button("Exportar JSON", instrumentation.to_json(reporte), "perfil.json", "application/json")
+        st.download_button("Exportar CSV", instrumentation.to_csv(reporte), "perfil.csv", "text/csv")
+        st.button("Reiniciar mediciones", on_click=instrumentation.reset)
 
-        if st.button("Entrar"):
-            if authenticate_user(username, password):
-                st.success(f"¡Bienvenido, {username}!")
-                st.session_state["authenticated"] = True
-                st.session_state["username"] = username
-            else:
-                st.error("Usuario o contraseña inválidos.")
-else:
-    # Crear pestañas
-    tabs = st.tabs(["Resumen de Allianz", "Análisis de ETFs", "Simulador de Rendimientos", "Indicadores Técnicos", "Proyecciones a Largo Plazo", "Resumen de Rendimiento"])
 
-    # Pestaña 1: Resumen de Allianz
-with tabs[0]:
+# Sección: Resumen de Allianz
+def seccion_resumen(tickers_seleccionados, periodo):
     st.markdown("<h1 style='text-align: center; color: navy;'>Resumen de Allianz Patrimonial</h1>", unsafe_allow_html=True)
 
     st.markdown("""
     <div style="background-color: #f9f9f9; padding: 20px; border-radius: 10px;">
     <p><b>Allianz Patrimonial</b> es una institución global de confianza con más de 130 años de experiencia en la industria financiera.</p>
     <p>Con una fuerte presencia en más de 70 países, Allianz se dedica a ofrecer servicios de inversión y gestión patrimonial de alta calidad, permitiendo a los clientes alcanzar sus objetivos financieros.</p>
-    
+
     <h3>Historia</h3>
     <ul>
         <li><b>1889:</b> Fundación de Allianz en Berlín.</li>
@@ -143,93 +123,375 @@ with tabs[0]:
     st.markdown("### ETFs Disponibles")
     etf_summary = pd.DataFrame.from_dict(etf_descriptions, orient='index', columns=['Descripción'])
     etf_summary.index.name = "Ticker"
-    st.table(etf_summary)
+    # Métricas precalculadas por metrics_snapshot.py: no se descargan precios aquí
+    instantanea = get_metrics_snapshot("1 año")
+    if instantanea:
+        fecha_instantanea, metricas = instantanea
+        etf_summary["Rendimiento 1 año (%)"] = [
+            metricas[ticker]['Cumulative Return'] * 100 if ticker in metricas else None for ticker in etf_summary.index
+        ]
+        etf_summary["Volatilidad Diaria (%)"] = [
+            metricas[ticker]['Volatility'] * 100 if ticker in metricas else None for ticker in etf_summary.index
+        ]
+        st.caption(f"Métricas calculadas el {fecha_instantanea:%d/%m/%Y}.")
+        st.table(etf_summary.style.format("{:.2f}", subset=["Rendimiento 1 año (%)", "Volatilidad Diaria (%)"], na_rep="N/D"))
+    else:
+        st.table(etf_summary)
+
+
+# Ventanas de la matriz de correlación (None = todo el período seleccionado) y estimadores
+VENTANAS_CORRELACION = {
+    "Período seleccionado": None,
+    "3 meses (63 días)": 63,
+    "6 meses (126 días)": 126,
+    "1 año (252 días)": 252,
+}
+ESTIMADORES_COVARIANZA = {"Muestral": "sample", "Exponencial (EWMA)": "ewma", "Ledoit-Wolf": "ledoit-wolf"}
+
+
+# Sección: Análisis de ETFs
+def seccion_analisis(tickers_seleccionados, periodo):
+    # Cargar y procesar datos: una sola matriz alineada (en caché) para todas las secciones
+    matriz = get_price_matrix(tickers_seleccionados, period=periodo)
+
+    # Gráfica comparativa
+    st.write("### Gráfica Comparativa de los ETFs Seleccionados")
+    warn_missing_tickers(matriz, tickers_seleccionados)
+    fig = render_figure(plot_comparative_performance, matriz, tickers_seleccionados)
+    if fig:
+        st.image(fig)
+    else:
+        st.warning("No se pudo generar la gráfica comparativa.")
+
+    # Matriz de correlación: por defecto, ventana móvil leída del tensor compartido del universo
+    col_ventana, col_estimador = st.columns(2)
+    ventana = col_ventana.selectbox("Ventana de correlación", list(VENTANAS_CORRELACION), index=3, key="ventana_correlacion")
+    estimador = col_estimador.selectbox("Estimador", list(ESTIMADORES_COVARIANZA), key="estimador_covarianza")
+    motor = None
+    if VENTANAS_CORRELACION[ventana]:
+        motor = get_covariance_engine(VENTANAS_CORRELACION[ventana], ESTIMADORES_COVARIANZA[estimador])
+
+    if len(tickers_seleccionados) > 1:
+        st.write("### Matriz de Correlación")
+        correlacion = None
+        if motor is not None:
+            correlacion = motor.correlation_at(tickers=[ticker for ticker in tickers_seleccionados if ticker in motor.tickers])
+            st.caption(f"Estimador {estimador}, ventana de {motor.window} días hasta el {motor.end_date:%d/%m/%Y}.")
+        heatmap = render_figure(plot_correlation_heatmap, matriz, tickers_seleccionados, correlacion)
+        if heatmap:
+            st.image(heatmap)
+
+    cartera_fragmento(matriz, tickers_seleccionados, periodo, motor)
+
+
+# Los sliders de la cartera solo vuelven a ejecutar este fragmento, no las gráficas de arriba
+@st.fragment
+def cartera_fragmento(matriz, tickers_seleccionados, periodo, motor=None):
+    inicio = time.perf_counter()
+    st.write("### Asignación de la Cartera")
+    monto_inversion = st.number_input("Monto total a invertir ($)", min_value=0.0, max_value=10000000.0, step=100.0, key="monto_inversion")
+    columnas = st.columns(min(len(tickers_seleccionados), 4) or 1)
+    asignacion = {
+        ticker: columnas[i % len(columnas)].slider(f"Porcentaje para {ticker} (%)", 0, 100, key=f"slider_{ticker}")
+        for i, ticker in enumerate(tickers_seleccionados)
+    }
+
+    # Carteras guardadas del usuario
+    with st.expander("Carteras Guardadas"):
+        carteras = st.session_state.get("carteras", {})
+        if carteras:
+            cartera_elegida = st.selectbox("Cartera", list(carteras), key="cartera_elegida")
+            # Cargar una cartera cambia la selección de ETFs: se vuelve a ejecutar toda la app
+            if st.button("Cargar cartera", on_click=apply_portfolio, args=(carteras[cartera_elegida],)):
+                st.rerun()
+        nombre_cartera = st.text_input("Nombre de la cartera", value=DEFAULT_PORTFOLIO, key="nombre_cartera")
+        if st.button("Guardar cartera"):
+            if not nombre_cartera.strip() or sum(asignacion.values()) == 0:
+                st.warning("Asigna un nombre y al menos un porcentaje para guardar la cartera.")
+            else:
+                save_portfolio(st.session_state["user_id"], asignacion, nombre_cartera.strip())
+                st.session_state["carteras"] = load_portfolios(st.session_state["user_id"])
+                st.success(f"Cartera '{nombre_cartera.strip()}' guardada.")
+
+    # Métricas de la cartera según las asignaciones de los sliders
+    total_asignado = sum(asignacion.values())
+    if total_asignado > 0 and not matriz.empty:
+        st.write("### Métricas de la Cartera")
+        if total_asignado != 100:
+            st.info(f"Las asignaciones suman {total_asignado}%; se normalizan para sumar 100%.")
+        pesos = [asignacion.get(ticker, 0) for ticker in matriz.tickers]
+        cartera = value_portfolio(matriz, asignacion)
+        if cartera['Annual Return'] is None:
+            st.warning("No hay suficientes datos comunes para calcular las métricas de la cartera.")
+        else:
+            col1, col2, col3, col4, col5 = st.columns(5)
+            col1.metric("Rendimiento Anual", f"{cartera['Annual Return']:.2%}")
+            col2.metric("Volatilidad Anual", f"{cartera['Annual Volatility']:.2%}")
+            col3.metric("Sharpe", f"{cartera['Sharpe Ratio']:.2f}" if cartera['Sharpe Ratio'] is not None else "N/D")
+            col4.metric("Sortino", f"{cartera['Sortino Ratio']:.2f}" if cartera['Sortino Ratio'] is not None else "N/D")
+            col5.metric("Máxima Caída", f"{cartera['Max Drawdown']:.2%}")
+            volatilidad_movil = motor.portfolio_volatility(asignacion) if motor is not None else None
+            if volatilidad_movil is not None:
+                st.caption(f"Volatilidad anual con la covarianza de los últimos {motor.window} días: {volatilidad_movil:.2%}")
+
+            pesos_normalizados = [peso / total_asignado for peso in pesos]
+            detalle = pd.DataFrame({
+                "Peso (%)": [peso * 100 for peso in pesos_normalizados],
+                "Monto ($)": [peso * monto_inversion for peso in pesos_normalizados],
+                "Contribución al Riesgo (%)": cartera['Risk Contribution'] * 100,
+            }, index=pd.Index(matriz.tickers, name="Ticker"))
+            st.table(detalle[detalle["Peso (%)"] > 0].style.format("{:,.2f}"))
+
+    # Carteras sugeridas: se calculan una vez por selección, período y covarianza
+    if len(tickers_seleccionados) > 1:
+        with st.expander("Optimizador de Cartera"):
+            optimizacion = get_optimal_portfolios(matriz, tickers_seleccionados, periodo, motor)
+            if optimizacion is None:
+                st.warning("No hay suficientes datos comunes para optimizar la cartera.")
+            else:
+                sugeridas = {"Máximo Sharpe": "Max Sharpe", "Mínima Varianza": "Min Variance", "Paridad de Riesgo": "Risk Parity"}
+                porcentajes = {nombre: to_percentages(optimizacion[clave]['Weights']) for nombre, clave in sugeridas.items()}
+                resumen = pd.DataFrame(porcentajes, index=pd.Index(optimizacion['Tickers'], name="Ticker"))
+                resumen.loc["Rendimiento Anual (%)"] = [optimizacion[clave]['Annual Return'] * 100 for clave in sugeridas.values()]
+                resumen.loc["Volatilidad Anual (%)"] = [optimizacion[clave]['Annual Volatility'] * 100 for clave in sugeridas.values()]
+                st.table(resumen.style.format("{:,.2f}"))
+
+                # La cartera actual se ubica con los mismos rendimientos esperados y covarianza que la frontera
+                actual = None
+                if total_asignado > 0:
+                    pesos_actuales = [asignacion.get(ticker, 0) / total_asignado for ticker in optimizacion['Tickers']]
+                    media, covarianza = optimizacion['Mean Returns'], optimizacion['Covariance']
+                    actual = (float(np.sqrt(pesos_actuales @ covarianza @ pesos_actuales)), float(media @ pesos_actuales))
+                frontera = render_figure(plot_efficient_frontier, optimizacion, actual)
+                if frontera:
+                    st.image(frontera)
+
+                elegida = st.selectbox("Cartera sugerida", list(sugeridas), key="cartera_sugerida")
+                nuevas = dict.fromkeys(tickers_seleccionados, 0)
+                nuevas.update(zip(optimizacion['Tickers'], porcentajes[elegida]))
+                st.button("Aplicar a los sliders", on_click=apply_suggested, args=(nuevas,))
+
+    st.caption(f"Cartera actualizada en {record_latency('Cartera', inicio):,.0f} ms")
+
+
+# Opciones del backtest del simulador
+FRECUENCIAS_APORTACION = {"Mensual": "monthly", "Trimestral": "quarterly", "Anual": "annual"}
+MODOS_REBALANCEO = {"Mensual": "monthly", "Trimestral": "quarterly", "Por umbral": "threshold", "Sin rebalanceo": "none"}
+
+
+# Sección: Simulador de Rendimientos
+def seccion_simulador(tickers_seleccionados, periodo):
+    st.markdown("## Simulador de Rendimientos")
+    monto_inicial = st.number_input("Monto Inicial ($)", min_value=0.0, value=10000.0, key="monto_inicial_simulador")
+    ticker_simulado = st.selectbox("Selecciona un ETF para Simular", tickers_seleccionados, key="simulador_ticker")
+
+    if ticker_simulado:
+        matriz = get_price_matrix(tickers_seleccionados, period=periodo)
+        if validate_ticker(matriz, ticker_simulado):
+            retorno = calculate_matrix_metrics(matriz)[ticker_simulado]['Cumulative Return']
+            monto_final = monto_inicial * (1 + retorno)
+            st.write(f"**Monto Final Estimado:** ${monto_final:,.2f}")
+
+    # Backtest de la cartera de los sliders de Análisis sobre el período seleccionado
+    st.markdown("### Backtest de la Cartera")
+    asignacion = {ticker: st.session_state.get(f"slider_{ticker}", 0) for ticker in tickers_seleccionados}
+    if sum(asignacion.values()) == 0:
+        st.info("Asigna porcentajes en Análisis de ETFs; mientras tanto se usan pesos iguales.")
+        asignacion = dict.fromkeys(tickers_seleccionados, 1)
+
+    col1, col2, col3, col4 = st.columns(4)
+    aportacion = col1.number_input("Aportación Periódica ($)", min_value=0.0, value=0.0, step=100.0, key="aportacion_backtest")
+    frecuencia = col2.selectbox("Frecuencia de Aportación", list(FRECUENCIAS_APORTACION), key="frecuencia_backtest")
+    rebalanceo = col3.selectbox("Rebalanceo", list(MODOS_REBALANCEO), key="rebalanceo_backtest")
+    costo = col4.number_input("Costo por Operación (pb)", min_value=0.0, max_value=500.0, value=10.0, step=5.0, key="costo_backtest")
+    umbral = 5
+    if MODOS_REBALANCEO[rebalanceo] == "threshold":
+        umbral = st.slider("Desviación máxima de los pesos (%)", 1, 25, 5, key="umbral_backtest")
+
+    matriz = get_price_matrix(tickers_seleccionados, period=periodo)
+    parametros = {
+        'initial_amount': monto_inicial, 'contribution': aportacion,
+        'contribution_frequency': FRECUENCIAS_APORTACION[frecuencia], 'threshold': umbral / 100, 'cost': costo / 10000,
+    }
+    resultado = run_backtest(matriz, asignacion, rebalance=MODOS_REBALANCEO[rebalanceo], **parametros)
+    if resultado is None:
+        st.warning("No hay suficientes datos comunes para el backtest de la cartera.")
+        return
+
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    col1.metric("Valor Final", f"${resultado['Final Value']:,.0f}")
+    col2.metric("Total Aportado", f"${resultado['Total Contributions']:,.0f}")
+    col3.metric("Rendimiento Anual", f"{resultado['Annual Return']:.2%}")
+    col4.metric("Máxima Caída", f"{resultado['Max Drawdown']:.2%}")
+    col5.metric("Rotación Total", f"{resultado['Total Turnover']:.2f}x")
+    col6.metric("Costos", f"${resultado['Total Costs']:,.2f}")
+    st.image(render_figure(plot_backtest, resultado))
+
+    with st.expander("Comparar Estrategias de Rebalanceo"):
+        st.caption("Ejecuta un backtest por cada combinación de rebalanceo y costo, en paralelo.")
+        if st.button("Ejecutar comparación"):
+            costos = sorted({0.0, parametros['cost'], 0.005})
+            configuraciones = [
+                {**parametros, **opciones}
+                for opciones in parameter_grid(rebalance=list(MODOS_REBALANCEO.values()), cost=costos)
+            ]
+            nombres = {valor: nombre for nombre, valor in MODOS_REBALANCEO.items()}
+            tabla = run_backtest_sweep(matriz, asignacion, configuraciones)
+            tabla = pd.DataFrame({
+                "Rebalanceo": tabla['rebalance'].map(nombres),
+                "Costo (pb)": tabla['cost'] * 10000,
+                "Valor Final ($)": tabla['Final Value'],
+                "Rendimiento Anual (%)": tabla['Annual Return'] * 100,
+                "Máxima Caída (%)": tabla['Max Drawdown'] * 100,
+                "Rotación Total": tabla['Total Turnover'],
+                "Rebalanceos": tabla['Rebalances'],
+            })
+            st.dataframe(tabla.style.format({
+                "Costo (pb)": "{:.0f}", "Valor Final ($)": "{:,.2f}", "Rendimiento Anual (%)": "{:.2f}",
+                "Máxima Caída (%)": "{:.2f}", "Rotación Total": "{:.2f}",
+            }), hide_index=True)
+
+
+# Sección: Indicadores Técnicos
+def seccion_indicadores(tickers_seleccionados, periodo):
+    st.markdown("## Indicadores Técnicos")
+    ticker_indicador = st.selectbox("Selecciona un ETF", tickers_seleccionados, key="indicadores_ticker")
+    if ticker_indicador:
+        matriz = get_price_matrix(tickers_seleccionados, period=periodo)
+        if validate_ticker(matriz, ticker_indicador):
+            # Solo se calculan las barras que llegaron desde la última ejecución
+            indicadores = get_indicator_set(tickers_seleccionados, periodo)
+            indicadores.update(matriz)
+            atr = indicadores.series("ATR 14", ticker_indicador).dropna() if "ATR 14" in indicadores.names else None
+            if atr is not None and not atr.empty:
+                st.write(f"**Rango Verdadero Promedio (ATR 14):** ${atr.iloc[-1]:,.2f}")
+            fig_indicadores = render_figure(plot_technical_indicators, indicadores, matriz, ticker_indicador)
+            if fig_indicadores:
+                st.image(fig_indicadores)
+
+
+# Sección: Proyecciones a Largo Plazo
+def seccion_proyecciones(tickers_seleccionados, periodo):
+    st.markdown("## Proyecciones a Largo Plazo")
+    monto_inicial = st.number_input("Monto Inicial ($)", min_value=0.0, value=10000.0, key="monto_inicial_proyecciones")
+    contribucion_periodica = st.number_input("Contribución Periódica ($)", min_value=0.0, value=500.0, key="contribucion_proyecciones")
+    horizonte = st.number_input("Horizonte de Tiempo (años)", min_value=1, max_value=50, value=10, key="horizonte_proyecciones")
+    ticker_simulado = st.selectbox("Selecciona un ETF para Simular", list(etf_descriptions.keys()), key="proyecciones_ticker")
+    metodos = {"Remuestreo histórico": "bootstrap", "Modelo lognormal": "normal"}
+    metodo = st.radio("Método de simulación", list(metodos), horizontal=True, key="metodo_proyecciones")
+    simulaciones = st.select_slider("Número de simulaciones", [1000, 10000, 100000], value=10000, key="simulaciones_proyecciones")
+
+    if ticker_simulado:
+        # Histórico de 10 años propio de esta sección; solo se carga cuando está visible
+        matriz_proyeccion = get_price_matrix([ticker_simulado], period="10 años")
+        if validate_ticker(matriz_proyeccion, ticker_simulado):
+            rendimientos = matriz_proyeccion.returns_series(ticker_simulado).to_numpy()
+            proyeccion = project_growth(monto_inicial, contribucion_periodica, rendimientos, int(horizonte), simulaciones, metodos[metodo])
+            bandas = proyeccion['Percentiles']
+            st.write(f"**Monto Final Estimado (mediana) después de {horizonte} años:** ${bandas[50][-1]:,.2f}")
+            st.write(f"Con un 90% de probabilidad el monto final estará entre ${bandas[5][-1]:,.2f} y ${bandas[95][-1]:,.2f}.")
+
+            st.image(render_figure(plot_projection, proyeccion, ticker_simulado))
+
+
+# Sección: Resumen de Rendimiento
+def seccion_rendimiento(tickers_seleccionados, periodo):
+    st.markdown("## Resumen de Rendimiento")
+    st.write("Próximamente: Información detallada sobre el rendimiento general.")
 
-    # Pestaña 2: Análisis de ETFs
-    with tabs[1]:
-        st.sidebar.header("Configurar Análisis")
 
-        tickers_seleccionados = st.sidebar.multiselect(
-            "Selecciona uno o más ETFs",
-            list(etf_descriptions.keys()),
-            default=["FXI", "SPY"]
-        )
+# Solo se ejecuta la sección visible; cada una carga sus propios datos (en caché)
+SECCIONES = {
+    "Resumen de Allianz": seccion_resumen,
+    "Análisis de ETFs": seccion_analisis,
+    "Simulador de Rendimientos": seccion_simulador,
+    "Indicadores Técnicos": seccion_indicadores,
+    "Proyecciones a Largo Plazo": seccion_proyecciones,
+    "Resumen de Rendimiento": seccion_rendimiento,
+}
 
-        periodo = st.sidebar.selectbox("Selecciona el período de tiempo", ["1 año", "3 años", "5 años", "10 años", "Desde inicio de año"])
+# Interfaz de inicio de sesión/registro
+if not st.session_state["authenticated"]:
+    st.sidebar.title("Inicio de Sesión")
+    menu = st.sidebar.radio("Selecciona una opción", ["Iniciar Sesión", "Registrarse"])
 
-        monto_inversion = st.sidebar.number_input("Monto total a invertir ($)", min_value=0.0, max_value=10000000.0, step=100.0, value=10000.0, key="monto_inversion")
-        asignacion = {ticker: st.sidebar.slider(f"Porcentaje para {ticker} (%)", 0, 100, 0, key=f"slider_{ticker}") for ticker in tickers_seleccionados}
+    if menu == "Registrarse":
+        st.title("Registro")
+        new_username = st.text_input("Elige un nombre de usuario")
+        new_password = st.text_input("Elige una contraseña", type="password")
+        confirm_password = st.text_input("Confirma tu contraseña", type="password")
 
-        # Cargar y procesar datos
-        datos = get_etf_data(tickers_seleccionados, period=periodo)
+        if st.button("Registrar"):
+            if new_password != confirm_password:
+                st.error("¡Las contraseñas no coinciden!")
+            elif user_exists(new_username):
+                st.error("¡El nombre de usuario ya existe! Por favor elige otro.")
+            elif save_user(new_username, hash_password(new_password)):
+                st.success("¡Usuario registrado exitosamente! Ahora inicia sesión.")
+            else:
+                # Otro registro simultáneo tomó el mismo nombre
+                st.error("¡El nombre de usuario ya existe! Por favor elige otro.")
 
-        # Gráfica comparativa
-        st.write("### Gráfica Comparativa de los ETFs Seleccionados")
-        fig = plot_comparative_performance(datos, tickers_seleccionados)
-        if fig:
-            st.pyplot(fig)
-        else:
-            st.warning("No se pudo generar la gráfica comparativa.")
-
-        # Métricas clave y matriz de correlación
-        if len(tickers_seleccionados) > 1:
-            st.write("### Matriz de Correlación")
-            heatmap = plot_correlation_heatmap(datos, tickers_seleccionados)
-            if heatmap:
-                st.pyplot(heatmap)
-
-    # Pestaña 3: Simulador de Rendimientos
-    with tabs[2]:
-        st.markdown("## Simulador de Rendimientos")
-        monto_inicial = st.number_input("Monto Inicial ($)", min_value=0.0, value=10000.0, key="monto_inicial_simulador")
-        ticker_simulado = st.selectbox("Selecciona un ETF para Simular", tickers_seleccionados, key="simulador_ticker")
-
-        if ticker_simulado:
-            data_simulado = datos[ticker_simulado]
-            if validate_data(data_simulado, ticker_simulado):
-                retorno = calculate_metrics(data_simulado)['Cumulative Return']
-                monto_final = monto_inicial * (1 + retorno)
-                st.write(f"**Monto Final Estimado:** ${monto_final:,.2f}")
-
-    # Pestaña 4: Indicadores Técnicos
-    with tabs[3]:
-        st.markdown("## Indicadores Técnicos")
-        ticker_indicador = st.selectbox("Selecciona un ETF", tickers_seleccionados, key="indicadores_ticker")
-        if ticker_indicador:
-            data_indicador = datos[ticker_indicador]
-            if validate_data(data_indicador, ticker_indicador):
-                st.write("### Media Móvil Simple")
-                media_movil = data_indicador['Close'].rolling(window=20).mean()
-                plt.figure(figsize=(12, 6))
-                plt.plot(data_indicador['Close'], label='Precio de Cierre', color='blue')
-                plt.plot(media_movil, label='Media Móvil (20 días)', color='orange')
-                plt.legend()
-                st.pyplot(plt)
-
-    # Pestaña 5: Proyecciones a Largo Plazo
-    with tabs[4]:
-        st.markdown("## Proyecciones a Largo Plazo")
-        monto_inicial = st.number_input("Monto Inicial ($)", min_value=0.0, value=10000.0, key="monto_inicial_proyecciones")
-        contribucion_periodica = st.number_input("Contribución Periódica ($)", min_value=0.0, value=500.0, key="contribucion_proyecciones")
-        horizonte = st.number_input("Horizonte de Tiempo (años)", min_value=1, max_value=50, value=10, key="horizonte_proyecciones")
-        ticker_simulado = st.selectbox("Selecciona un ETF para Simular", list(etf_descriptions.keys()), key="proyecciones_ticker")
-
-        if ticker_simulado:
-            datos = get_etf_data([ticker_simulado], period="10 años")
-            retorno_historico = calculate_metrics(datos[ticker_simulado])['Average Return']
-            if retorno_historico:
-                proyeccion = simulate_long_term_growth(monto_inicial, contribucion_periodica, retorno_historico, horizonte)
-                st.write(f"**Monto Final Estimado después de {horizonte} años:** ${proyeccion[-1]:,.2f}")
-
-                plt.figure(figsize=(12, 6))
-                plt.plot(proyeccion, label="Crecimiento Proyectado")
-                plt.title(f"Proyección de Crecimiento para {ticker_simulado}")
-                plt.xlabel("Años")
-                plt.ylabel("Monto Acumulado ($)")
-                plt.legend()
-                st.pyplot(plt)
-
-# Pestaña 6: Resumen de Rendimiento
-with tabs[5]:
-    st.markdown("## Resumen de Rendimiento")
-    st.write("Próximamente: Información detallada sobre el rendimiento general.")
+    elif menu == "Iniciar Sesión":
+        st.title("Iniciar Sesión")
+        username = st.text_input("Usuario")
+        password = st.text_input("Contraseña", type="password")
+
+        if st.button("Entrar"):
+            if authenticate_user(username, password):
+                st.success(f"¡Bienvenido, {username}!")
+                st.session_state["authenticated"] = True
+                st.session_state["username"] = username
+                st.session_state["user_id"] = get_user_id(username)
+                # Precargar la cartera guardada del usuario en los sliders
+                carteras = load_portfolios(st.session_state["user_id"])
+                st.session_state["carteras"] = carteras
+                if carteras:
+                    apply_portfolio(carteras.get(DEFAULT_PORTFOLIO) or next(iter(carteras.values())))
+            else:
+                st.error("Usuario o contraseña inválidos.")
+else:
+    # Módulos pesados: la página de inicio de sesión no los necesita y
+    # normalmente ya los importó el hilo de precarga mientras el usuario escribía
+    wait_for_imports()
+    import numpy as np
+    import pandas as pd
+    from functionsappa import (
+        get_price_matrix, calculate_matrix_metrics, plot_performance,
+        plot_comparative_performance, get_sector_allocation,
+        plot_sector_allocation, plot_correlation_heatmap, validate_ticker,
+        plot_monetary_returns_pie, project_growth,
+        get_indicator_set, plot_technical_indicators, plot_projection,
+        render_figure, warn_missing_tickers, get_metrics_snapshot, value_portfolio,
+        get_covariance_engine, get_optimal_portfolios, plot_efficient_frontier,
+        run_backtest, run_backtest_sweep, plot_backtest
+    )
+    from backtest import parameter_grid
+    from optimizer import to_percentages
+
+    keep_portfolio_state()
+
+    seccion = st.sidebar.radio("Navegación", list(SECCIONES), key="seccion")
+
+    st.sidebar.header("Configurar Análisis")
+    tickers_seleccionados = st.sidebar.multiselect(
+        "Selecciona uno o más ETFs",
+        list(etf_descriptions.keys()),
+        key="tickers_seleccionados"
+    )
+    periodo = st.sidebar.selectbox("Selecciona el período de tiempo", ["1 año", "3 años", "5 años", "10 años", "Desde inicio de año"], key="periodo")
+
+    # ?debug=1 muestra el panel solo en esta sesión; ?debug=0 lo oculta
+    if "debug" in st.query_params:
+        st.session_state["debug"] = st.query_params["debug"] == "1"
+
+    with instrumentation.stage(f"Sección: {seccion}"):
+        SECCIONES[seccion](tickers_seleccionados, periodo)
+
+    st.sidebar.caption(f"Última ejecución ({seccion}): {record_latency(seccion, inicio_ejecucion):,.0f} ms")
+
+    if st.session_state.get("debug"):
+        debug_panel()
+
+# Precarga en segundo plano (una vez por proceso), con la página ya enviada
+start_warmup()
@@ -0,0 +1,201 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from portfolio import TRADING_DAYS, normalize_weights
+
+# Frecuencias de calendario para rebalanceos y aportaciones (meses entre eventos)
+FREQUENCIES = {"monthly": 1, "quarterly": 3, "semiannual": 6, "annual": 12}
+
+# Modos de rebalanceo: por calendario, por desviación de los pesos o nunca
+REBALANCE_MODES = (*FREQUENCIES, "threshold", "none")
+
+# Trabajo mínimo (configuraciones x fechas x activos con peso) para usar procesos en `sweep`:
+# con ~60 ns por celda equivale a unos 3 s en serie, más que el costo de arrancar los procesos
+PARALLEL_MIN_CELLS = 50_000_000
+
+# Resultados escalares que devuelve `sweep` para cada configuración
+SUMMARY_KEYS = (
+    'Final Value', 'Total Contributions', 'Annual Return', 'Annual Volatility',
+    'Max Drawdown', 'Total Turnover', 'Total Costs', 'Rebalances',
+)
+
+
+def period_ends(dates, months):
+    """Marca el último día hábil de cada bloque de `months` meses (la última fecha nunca se marca)."""
+    month_numbers = np.asarray(dates, dtype="datetime64[M]").astype("int64")
+    blocks = month_numbers // months
+    ends = np.zeros(len(blocks), dtype=bool)
+    ends[:-1] = blocks[1:] != blocks[:-1]
+    return ends
+
+
+def backtest(returns, weights, dates, initial_amount=10_000.0, contribution=0.0,
+             contribution_frequency="monthly", rebalance="monthly", threshold=0.05,
+             cost=0.0, periods_per_year=TRADING_DAYS):
+    """Reproduce una cartera sobre rendimientos diarios históricos.
+
+    `returns` es una matriz fechas x tickers (como `PriceMatrix.returns`) y
+    `weights` los pesos objetivo, uno por columna. La simulación empieza en
+    la primera fecha en que todos los activos con peso tienen rendimiento;
+    los huecos posteriores cuentan como rendimiento 0.
+
+    Los eventos ocurren al cierre del último día hábil de cada período:
+    la aportación se invierte según los pesos objetivo y, con rebalanceo por
+    calendario, toda la cartera vuelve a esos pesos. Con
+    `rebalance="threshold"` se rebalancea el primer día en que algún peso
+    se desvía más de `threshold` del objetivo. `cost` es la fracción del
+    monto operado que se paga como costo de transacción, también al invertir
+    el monto inicial y las aportaciones. La rotación de cada fecha es el
+    monto operado (compras de aportaciones incluidas) sobre el valor de la
+    cartera.
+
+    Entre eventos las posiciones solo se capitalizan, así que cada tramo se
+    calcula de una vez con un producto acumulado vectorizado; el número de
+    iteraciones es el número de eventos, no de días.
+    """
+    if rebalance not in REBALANCE_MODES:
+        raise ValueError(f"Modo de rebalanceo no soportado: {rebalance}")
+    if contribution and contribution_frequency not in FREQUENCIES:
+        raise ValueError(f"Frecuencia de aportación no soportada: {contribution_frequency}")
+
+    weights = normalize_weights(weights)
+    held = weights > 0
+    target = weights[held]
+    returns = np.asarray(returns, dtype="float64")[:, held]
+    complete = ~np.isnan(returns).any(axis=1)
+    if not complete.any():
+        raise ValueError("No hay fechas con rendimientos para todos los activos de la cartera.")
+    start = complete.argmax()
+    growth = 1 + np.nan_to_num(returns[start:])
+    dates = np.asarray(dates)[start:]
+    n_rows = len(growth)
+
+    contributes = period_ends(dates, FREQUENCIES[contribution_frequency]) if contribution else np.zeros(n_rows, bool)
+    rebalances = period_ends(dates, FREQUENCIES[rebalance]) if rebalance in FREQUENCIES else np.zeros(n_rows, bool)
+    # Con umbral, los fines de mes acotan cada búsqueda de la siguiente desviación
+    checkpoints = period_ends(dates, 1) if rebalance == "threshold" else np.zeros(n_rows, bool)
+    boundaries = np.flatnonzero(contributes | rebalances | checkpoints)
+
+    before = np.empty(n_rows)            # valor al cierre, antes de los eventos del día
+    equity = np.empty(n_rows)            # valor al cierre, después de aportaciones y costos
+    turnover = np.zeros(n_rows)
+    costs = np.zeros(n_rows)
+    flows = np.zeros(n_rows)
+    rebalanced = np.zeros(n_rows, bool)
+
+    initial_cost = cost * initial_amount
+    positions = (initial_amount - initial_cost) * target
+    row = 0
+    next_boundary = 0
+    while row < n_rows:
+        while next_boundary < len(boundaries) and boundaries[next_boundary] < row:
+            next_boundary += 1
+        end = boundaries[next_boundary] if next_boundary < len(boundaries) else n_rows - 1
+        path = positions * np.cumprod(growth[row:end + 1], axis=0)
+        breach = False
+        if rebalance == "threshold":
+            drift = np.abs(path / path.sum(axis=1, keepdims=True) - target).max(axis=1) > threshold
+            if drift.any():
+                breach = True
+                end = row + drift.argmax()
+                path = path[:end - row + 1]
+        values = path.sum(axis=1)
+        before[row:end + 1] = values
+        equity[row:end + 1] = values
+        positions = path[-1]
+
+        added = contribution if contributes[end] else 0.0
+        total = values[-1] + added
+        if (rebalances[end] or breach) and total > 0:
+            trades = np.abs(total * target - positions).sum()
+            fee = cost * trades
+            positions = (total - fee) * target
+            rebalanced[end] = True
+        else:
+            trades = added
+            fee = cost * added
+            positions = positions + (added - fee) * target
+        if trades:
+            turnover[end] = trades / total
+            costs[end] = fee
+            flows[end] = added
+            equity[end] = positions.sum()
+        row = end + 1
+
+    # Rendimiento ponderado en el tiempo: las aportaciones no cuentan como ganancia, los costos sí restan
+    daily = np.empty(n_rows)
+    daily[0] = before[0] / initial_amount - 1
+    daily[1:] = before[1:] / (equity[:-1] + costs[:-1]) - 1
+    index = np.cumprod(1 + daily)
+    drawdown = index / np.maximum.accumulate(np.maximum(index, 1.0)) - 1
+    annual_return = index[-1] ** (periods_per_year / n_rows) - 1
+
+    return {
+        'Dates': dates,
+        'Equity': equity,
+        'Returns': daily,
+        'Drawdown': drawdown,
+        'Turnover': turnover,
+        'Costs': costs,
+        'Contributions': flows,
+        'Rebalanced': rebalanced,
+        'Final Value': float(equity[-1]),
+        'Total Contributions': float(initial_amount + flows.sum()),
+        'Annual Return': float(annual_return),
+        'Annual Volatility': float(daily.std(ddof=1) * np.sqrt(periods_per_year)) if n_rows > 1 else None,
+        'Max Drawdown': float(drawdown.min()),
+        'Total Turnover': float(turnover.sum()),
+        'Total Costs': float(costs.sum() + initial_cost),
+        'Rebalances': int(rebalanced.sum()),
+    }
+
+
+def parameter_grid(**options):
+    """Todas las combinaciones de opciones: `parameter_grid(rebalance=["monthly", "none"], cost=[0, 0.001])`."""
+    names = list(options)
+    return [dict(zip(names, values)) for values in itertools.product(*options.values())]
+
+
+def _summarize(returns, dates, configuration):
+    result = backtest(returns, dates=dates, **configuration)
+    return {**configuration, **{key: result[key] for key in SUMMARY_KEYS}}
+
+
+# Datos de cada proceso del grupo; solo se usan en procesos creados por `sweep`
+_worker_data = {}
+
+
+def _init_worker(returns, dates):
+    _worker_data["returns"] = returns
+    _worker_data["dates"] = dates
+
+
+def _run_configuration(configuration):
+    return _summarize(_worker_data["returns"], _worker_data["dates"], configuration)
+
+
+def sweep(returns, dates, configurations, max_workers=None):
+    """Ejecuta un backtest por configuración, en paralelo si el trabajo lo justifica.
+
+    Cada configuración es un diccionario de argumentos de `backtest` (pesos
+    incluidos). Los rendimientos se envían una sola vez a cada proceso y de
+    vuelta solo viajan los resultados de `SUMMARY_KEYS`, junto con la
+    configuración. Los procesos se crean con "spawn", que funciona igual en
+    Windows y no hereda los hilos del servidor de Streamlit, pero arrancarlos
+    cuesta segundos: por debajo de `PARALLEL_MIN_CELLS` celdas, o con
+    `max_workers=1`, todo se ejecuta en el proceso actual, sin estado global
+    (las sesiones de Streamlit son hilos del mismo proceso).
+    """
+    returns = np.asarray(returns, dtype="float64")
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    max_workers = max_workers or os.cpu_count() or 1
+    cells = sum(len(returns) * np.count_nonzero(configuration["weights"]) for configuration in configurations)
+    if max_workers == 1 or len(configurations) < 2 or cells < PARALLEL_MIN_CELLS:
+        return [_summarize(returns, dates, configuration) for configuration in configurations]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(configurations)), mp_context=get_context("spawn"),
+                             initializer=_init_worker, initargs=(returns, dates)) as pool:
+        return list(pool.map(_run_configuration, configurations))
@@ -0,0 +1,86 @@
+"""Mide el tiempo de descarga de 1, 10 y 31 tickers con un proveedor simulado.
+
+Uso: python benchmarks/bench_fetch.py [--latency 0.2]
+
+Compara el bucle secuencial original, la descarga concurrente con pool de
+hilos y la descarga en lote, todas contra un proveedor sin red que añade
+una latencia fija a cada petición.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_store import OfflineProvider, PriceStore  # noqa: E402
+
+SIZES = (1, 10, 31)
+
+
+class LatencyProvider(OfflineProvider):
+    """Proveedor sin red que espera `latency` segundos en cada petición."""
+
+    def __init__(self, frames, latency, batch=False):
+        super().__init__(frames)
+        self.latency = latency
+        self.supports_batch = batch
+
+    def history(self, ticker, start=None, end=None, period=None):
+        time.sleep(self.latency)
+        return super().history(ticker, start=start, end=end, period=period)
+
+    def history_many(self, tickers, start=None, end=None, period=None):
+        time.sleep(self.latency)
+        return {ticker: OfflineProvider.history(self, ticker, start, end, period) for ticker in tickers}
+
+
+def make_frames(n_tickers, years=10):
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=252 * years)
+    rng = np.random.default_rng(0)
+    frames = {}
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(dates))))
+        frames[f"T{i:02d}"] = pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Volume": 1e6, "Dividends": 0.0, "Stock Splits": 0.0,
+        }, index=dates)
+    return frames
+
+
+def time_sequential(provider, tickers):
+    start = time.perf_counter()
+    for ticker in tickers:
+        provider.history(ticker, period="max")
+    return time.perf_counter() - start
+
+
+def time_store(provider, tickers):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, "bench.db"), provider)
+        start = time.perf_counter()
+        store.update_many(tickers)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia simulada por petición (s)")
+    args = parser.parse_args()
+
+    frames = make_frames(max(SIZES))
+    print(f"{'tickers':>8} {'secuencial':>12} {'concurrente':>12} {'lote':>10}")
+    for size in SIZES:
+        tickers = list(frames)[:size]
+        sequential = time_sequential(LatencyProvider(frames, args.latency), tickers)
+        concurrent = time_store(LatencyProvider(frames, args.latency), tickers)
+        batch = time_store(LatencyProvider(frames, args.latency, batch=True), tickers)
+        print(f"{size:>8} {sequential:>11.2f}s {concurrent:>11.2f}s {batch:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
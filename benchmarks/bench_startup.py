@@ -0,0 +1,115 @@
+"""Mide el arranque en frío hasta la primera página de inicio de sesión.
+
+Uso: python benchmarks/bench_startup.py [--repeat 5] [--top 15] [--eager]
+
+Cada intento es un intérprete nuevo que ejecuta `appatrimonial.py` con
+`streamlit.testing` bajo `-X importtime`. Se informa el tiempo de cargar
+Streamlit, el de la primera ejecución del script (hasta la página de
+inicio de sesión completa) y el del proceso entero, más el desglose de
+los módulos que importó la página según `-X importtime`. Con `--eager` la
+página importa además todos los módulos pesados, como hacía antes la
+aplicación, para comparar.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "appatrimonial.py")
+
+# Se marca en stderr el inicio del script para separar sus importaciones de las de Streamlit
+MARKER = "--- appatrimonial ---"
+
+CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+os.environ["ETF_PREWARM"] = "0"
+os.environ["ETF_REFRESHER"] = "0"
+sys.path.insert(0, {root!r})
+import streamlit as st
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+set_log_level("error")
+# El logo usa una ruta local de Windows que no existe en otras máquinas
+st.image = lambda *args, **kwargs: None
+loaded = time.perf_counter()
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+if {eager!r}:
+    # `__import__` (no `importlib`) para que -X importtime anide los submódulos bajo cada paquete
+    from warmup import HEAVY_MODULES
+    for name in HEAVY_MODULES:
+        __import__(name)
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+done = time.perf_counter()
+heavy = ["numpy", "pandas", "matplotlib", "seaborn", "scipy", "yfinance", "functionsappa"]
+print(json.dumps({{
+    "streamlit": loaded - start, "script": done - loaded,
+    "errors": [e.message for e in at.exception],
+    "heavy": [name for name in heavy if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Tiempo acumulado (s) de cada importación de primer nivel posterior a `MARKER`."""
+    modules = {}
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name[1:]
+        if name.startswith(" "):
+            # Importación anidada: ya cuenta en el acumulado de su módulo padre
+            continue
+        modules[name.strip()] = modules.get(name.strip(), 0.0) + int(cumulative) / 1e6
+    return modules
+
+
+def run_once(eager):
+    code = CHILD.format(root=ROOT, app=APP, marker=MARKER, eager=eager)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=ROOT, check=True)
+    elapsed = time.perf_counter() - start
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    summary["process"] = elapsed
+    summary["imports"] = parse_importtime(result.stderr)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Intérpretes nuevos a medir (se toma la mediana)")
+    parser.add_argument("--top", type=int, default=15, help="Importaciones de la página a mostrar")
+    parser.add_argument("--eager", action="store_true", help="Importar también los módulos pesados en la página")
+    args = parser.parse_args()
+
+    runs = [run_once(args.eager) for _ in range(args.repeat)]
+    errors = {error for run in runs for error in run["errors"]}
+    for error in errors:
+        print(f"Error en la página: {error}")
+
+    print(f"Arranque en frío, mediana de {args.repeat} intérpretes nuevos")
+    for key, label in (("streamlit", "Carga de Streamlit"), ("script", "Script hasta la página de inicio de sesión"),
+                       ("process", "Proceso completo")):
+        print(f"  {label:<44} {statistics.median(run[key] for run in runs) * 1000:>8,.0f} ms")
+    print(f"  Módulos pesados cargados: {', '.join(runs[0]['heavy']) or 'ninguno'}")
+
+    names = {name for run in runs for name in run["imports"]}
+    imports = {name: statistics.median(run["imports"].get(name, 0.0) for run in runs) for name in names}
+    print(f"\nImportaciones de la página (acumulado, {sum(imports.values()) * 1000:,.0f} ms en total)")
+    for name, seconds in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<44} {seconds * 1000:>8,.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Benchmarks sin red de las funciones principales, comparados contra una línea base.
+
+Uso: python benchmarks/bench_suite.py [--sizes pequeño mediano grande]
+                                      [--repeat 5] [--threshold 0.2]
+                                      [--baseline benchmarks/baseline.json]
+                                      [--save-baseline]
+
+Los precios vienen de `SyntheticProvider`, así que los resultados solo
+dependen de la máquina. Cada medición es el mejor de `--repeat` intentos.
+Con `--save-baseline` los tiempos se guardan como nueva línea base local;
+sin esa opción se comparan con ella y el script termina con código 1 si
+alguna medición empeora más que `--threshold` (0.2 = 20%).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import streamlit as st  # noqa: E402
+from streamlit.logger import set_log_level  # noqa: E402
+
+# Fuera de `streamlit run` las cachés funcionan, pero avisan en cada llamada
+set_log_level("error")
+
+import database  # noqa: E402
+import functionsappa  # noqa: E402
+import user_management  # noqa: E402
+from etf_catalog import etf_descriptions  # noqa: E402
+from market_cache import SharedMarketCache, set_market_cache  # noqa: E402
+from price_matrix import PriceMatrix  # noqa: E402
+from price_store import PriceStore, set_price_store  # noqa: E402
+from synthetic import SyntheticProvider  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Tamaños de datos: tickers del catálogo, años de histórico, usuarios registrados
+# y horizonte de `simulate_long_term_growth`
+SIZES = {
+    "pequeño": {"tickers": 5, "years": 3, "gap_rate": 0.01, "users": 100, "horizon": 10},
+    "mediano": {"tickers": 15, "years": 10, "gap_rate": 0.02, "users": 1_000, "horizon": 30},
+    "grande": {"tickers": 31, "years": 20, "gap_rate": 0.02, "users": 10_000, "horizon": 50},
+}
+
+PASSWORD = "contraseña-de-prueba"
+
+
+def measure(func, repeat, number=1, setup=None):
+    """Mejor tiempo por llamada de `func` en `repeat` intentos de `number` llamadas.
+
+    `setup` se ejecuta antes de cada intento y no se incluye en la medición.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def add_users(target):
+    """Registra usuarios de prueba hasta que la tabla tenga `target` filas."""
+    password_hash = user_management.hash_password(PASSWORD)
+    with database.get_connection() as conn, conn:
+        count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO users (username, password) VALUES (?, ?)",
+            [(f"usuario{i}", password_hash) for i in range(count, target)],
+        )
+
+
+def bench_size(config, repeat, tmp):
+    tickers = list(etf_descriptions)[:config["tickers"]]
+    provider = SyntheticProvider(tickers, config["years"], config["gap_rate"])
+    results = {}
+    stores = iter(range(10 ** 6))
+    # Sin caché compartida publicada, `get_etf_data` lee del almacén
+    cache = SharedMarketCache(os.path.join(tmp, f"cache{config['tickers']}"), check_interval=0)
+    set_market_cache(cache)
+
+    def empty_store():
+        st.cache_data.clear()
+        set_price_store(PriceStore(os.path.join(tmp, f"precios{next(stores)}.db"), provider))
+
+    results["get_etf_data (almacén vacío)"] = measure(
+        lambda: functionsappa.get_etf_data(tickers, period="max"), repeat, setup=empty_store)
+    # El último almacén queda con todo el histórico: ahora solo se lee de SQLite
+    results["get_etf_data (almacén lleno)"] = measure(
+        lambda: functionsappa.get_etf_data(tickers, period="max"), repeat, setup=st.cache_data.clear)
+
+    data = functionsappa.get_etf_data(tickers, period="max")
+    cache.publish(data)
+    results["get_etf_data (caché compartida)"] = measure(
+        lambda: functionsappa.get_etf_data(tickers, period="max"), repeat)
+    results["calculate_metrics"] = measure(
+        lambda: [functionsappa.calculate_metrics(df) for df in data.values()], repeat)
+
+    matrix = PriceMatrix.from_frames(data, tickers)
+    results["plot_correlation_heatmap + PNG"] = measure(
+        lambda: functionsappa.figure_to_png(functionsappa.plot_correlation_heatmap(matrix, tickers)), repeat)
+
+    results["simulate_long_term_growth"] = measure(
+        lambda: functionsappa.simulate_long_term_growth(10000, 500, 0.07, config["horizon"]), repeat, number=1000)
+
+    add_users(config["users"])
+    existing = f"usuario{config['users'] // 2}"
+    new_users = iter(range(10 ** 9))
+    results["hash_password"] = measure(lambda: user_management.hash_password(PASSWORD), repeat, number=1000)
+    results["authenticate_user"] = measure(
+        lambda: user_management.authenticate_user(existing, PASSWORD), repeat, number=200)
+    results["user_exists"] = measure(lambda: user_management.user_exists("no-existe"), repeat, number=200)
+    results["save_user"] = measure(
+        lambda: user_management.save_user(f"nuevo{config['users']}_{next(new_users)}", "x"), repeat, number=50)
+    results["load_users"] = measure(user_management.load_users, repeat, number=5)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Imprime la tabla de resultados y devuelve las mediciones que empeoraron."""
+    regressions = []
+    print(f"{'medición':<48} {'actual':>10} {'base':>10} {'cambio':>8}")
+    for key, seconds in results.items():
+        reference = baseline.get(key)
+        if reference:
+            change = seconds / reference - 1
+            flag = "  REGRESIÓN" if change > threshold else ""
+            if flag:
+                regressions.append(key)
+            print(f"{key:<48} {seconds * 1000:>8.3f}ms {reference * 1000:>8.3f}ms {change:>+7.1%}{flag}")
+        else:
+            print(f"{key:<48} {seconds * 1000:>8.3f}ms {'-':>10} {'-':>8}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES), help="Tamaños de datos a medir")
+    parser.add_argument("--repeat", type=int, default=5, help="Intentos por medición (se toma el mejor)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Empeoramiento tolerado respecto de la línea base")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Archivo JSON con la línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como nueva línea base")
+    args = parser.parse_args()
+
+    results = {}
+    # Las conexiones del pool siguen abiertas al salir; en Windows no se pueden borrar
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        database.DB_PATH = os.path.join(tmp, "usuarios.db")
+        database.USERS_CSV = os.path.join(tmp, "no-existe.csv")
+        # Los tamaños se recorren en orden para que la tabla de usuarios solo crezca
+        for size in sorted(args.sizes, key=lambda size: SIZES[size]["users"]):
+            for name, seconds in bench_size(SIZES[size], args.repeat, tmp).items():
+                results[f"{size}/{name}"] = seconds
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**baseline, **results}, f, indent=2, ensure_ascii=False)
+        print(f"Línea base guardada en {args.baseline}.")
+    elif regressions:
+        print(f"{len(regressions)} mediciones empeoraron más de {args.threshold:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Compara los módulos numéricos con implementaciones de referencia directas.
+
+Uso: python benchmarks/check_reference.py [--years 5] [--window 63] [--tolerance 1e-9]
+
+Los precios vienen de `SyntheticProvider` (con huecos), así que no hace
+falta red. Cada comprobación calcula lo mismo de la forma más simple
+posible (pandas, fórmulas directas, bucles día a día) y mide el mayor
+error relativo contra la versión optimizada. El script termina con código
+1 si alguna comprobación supera `--tolerance`.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import backtest  # noqa: E402
+from covariance import CovarianceEngine  # noqa: E402
+from price_matrix import PriceMatrix  # noqa: E402
+from synthetic import SyntheticProvider  # noqa: E402
+
+TICKERS = ["SPY", "QQQ", "GLD", "TLT", "FXI", "EEM"]
+
+# Filas que se quitan a los precios sintéticos para ejercitar los NaN
+LATE_LISTING = 300
+LONG_GAP = slice(600, 640)
+
+# Barridos simultáneos en hilos, como varias sesiones de Streamlit en el mismo proceso
+THREADS = 8
+
+# Cartera de los backtests; el peso cero comprueba que se ignoran los activos sin peso
+WEIGHTS = [30, 20, 15, 25, 0, 10]
+
+
+def relative_error(actual, expected):
+    """Mayor error relativo entre dos arreglos; los NaN deben coincidir."""
+    actual, expected = np.asarray(actual, dtype="float64"), np.asarray(expected, dtype="float64")
+    if not np.array_equal(np.isnan(actual), np.isnan(expected)):
+        return np.inf
+    valid = ~np.isnan(expected)
+    if not valid.any():
+        return 0.0
+    scale = max(np.abs(expected[valid]).max(), np.finfo(float).tiny)
+    return float(np.abs(actual[valid] - expected[valid]).max() / scale)
+
+
+def check_sample_covariance(matrix, window):
+    """Covarianza muestral móvil contra `DataFrame.rolling(...).cov()`."""
+    engine = CovarianceEngine(matrix, window, "sample")
+    n = len(matrix.tickers)
+    expected = pd.DataFrame(matrix.returns).rolling(window).cov().to_numpy().reshape(len(matrix), n, n)
+    return relative_error(engine.covariance, expected)
+
+
+def check_ewma_covariance(matrix, window):
+    """EWMA contra `ewm(adjust=False)` de pandas sobre r_i·r_j, sin mirar hacia adelante."""
+    engine = CovarianceEngine(matrix, window, "ewma")
+    n = len(matrix.tickers)
+    products = (matrix.returns[:, :, None] * matrix.returns[:, None, :]).reshape(len(matrix), n * n)
+    # `ignore_na` conserva el último valor en los huecos en lugar de descontarlo
+    expected = pd.DataFrame(products).ewm(span=window, adjust=False, ignore_na=True).mean()
+    expected = expected.to_numpy().reshape(len(matrix), n, n)
+    error = relative_error(engine.covariance, expected)
+
+    # Truncar la muestra no debe cambiar las covarianzas de las fechas anteriores
+    cut = len(matrix) // 2
+    truncated = PriceMatrix(matrix.dates[:cut], matrix.tickers, matrix.close[:cut])
+    return max(error, relative_error(CovarianceEngine(truncated, window, "ewma").covariance, engine.covariance[:cut]))
+
+
+def direct_ledoit_wolf(returns):
+    """Ledoit-Wolf (2004) sobre una ventana completa, como en scikit-learn, con escala ddof=1."""
+    n, p = returns.shape
+    centered = returns - returns.mean(axis=0)
+    empirical = centered.T @ centered / n
+    mu = np.trace(empirical) / p
+    delta_ = (empirical ** 2).sum()
+    squares = centered ** 2
+    beta = ((squares.T @ squares).sum() / n - delta_) / (p * n)
+    delta = (delta_ - 2 * mu * np.trace(empirical) + p * mu ** 2) / p
+    shrinkage = 0.0 if delta <= 0 else min(beta, delta) / delta
+    shrunk = (1 - shrinkage) * empirical + shrinkage * mu * np.eye(p)
+    return shrunk * n / (n - 1), shrinkage
+
+
+def check_ledoit_wolf(matrix, window):
+    """Ledoit-Wolf con sumas móviles contra la fórmula directa en cada ventana (tickers con ventana completa)."""
+    engine = CovarianceEngine(matrix, window, "ledoit-wolf")
+    error = 0.0
+    for row in range(window, len(matrix)):
+        block = matrix.returns[row - window + 1:row + 1]
+        valid = ~np.isnan(block).any(axis=0)
+        if not valid.any():
+            continue
+        expected, shrinkage = direct_ledoit_wolf(block[:, valid])
+        columns = np.flatnonzero(valid)
+        error = max(
+            error,
+            relative_error(engine.covariance[row][np.ix_(columns, columns)], expected),
+            relative_error(engine.shrinkage[row], shrinkage),
+        )
+    return error
+
+
+def naive_backtest(returns, weights, dates, initial_amount=10_000.0, contribution=0.0,
+                   contribution_frequency="monthly", rebalance="monthly", threshold=0.05, cost=0.0):
+    """Backtest día por día, con las mismas reglas que `backtest` pero sin vectorizar."""
+    weights = np.asarray(weights, dtype="float64") / np.sum(weights)
+    held = weights > 0
+    target = weights[held]
+    returns = returns[:, held]
+    start = np.flatnonzero(~np.isnan(returns).any(axis=1))[0]
+    months = np.asarray(dates, dtype="datetime64[M]").astype("int64")
+
+    def period_end(row, frequency):
+        block = backtest.FREQUENCIES[frequency]
+        return row + 1 < len(months) and months[row + 1] // block != months[row] // block
+
+    positions = initial_amount * (1 - cost) * target
+    equity, turnover, costs = [], [], []
+    for row in range(start, len(returns)):
+        positions = positions * (1 + np.nan_to_num(returns[row]))
+        value = positions.sum()
+        added = contribution if contribution and period_end(row, contribution_frequency) else 0.0
+        total = value + added
+        if rebalance == "threshold":
+            rebalances = np.abs(positions / value - target).max() > threshold
+        else:
+            rebalances = rebalance in backtest.FREQUENCIES and period_end(row, rebalance)
+        if rebalances and total > 0:
+            trades = np.abs(total * target - positions).sum()
+            positions = (total - cost * trades) * target
+        else:
+            trades = added
+            positions = positions + added * (1 - cost) * target
+        equity.append(positions.sum())
+        turnover.append(trades / total if trades else 0.0)
+        costs.append(cost * trades)
+    return {"Equity": np.array(equity), "Turnover": np.array(turnover), "Costs": np.array(costs)}
+
+
+def backtest_configurations():
+    return backtest.parameter_grid(
+        weights=[WEIGHTS], rebalance=list(backtest.REBALANCE_MODES), contribution=[0.0, 500.0],
+        contribution_frequency=["monthly", "quarterly"], cost=[0.0, 0.001],
+    )
+
+
+def check_backtest(matrix, window):
+    """Backtest vectorizado contra el bucle día por día, en todos los modos de rebalanceo."""
+    error = 0.0
+    for configuration in backtest_configurations():
+        result = backtest.backtest(matrix.returns, dates=matrix.dates, **configuration)
+        expected = naive_backtest(matrix.returns, dates=matrix.dates, **configuration)
+        error = max(error, *(relative_error(result[key], expected[key]) for key in expected))
+    return error
+
+
+def sweep_error(results, expected):
+    return max(
+        relative_error(result[key], reference[key])
+        for result, reference in zip(results, expected) for key in backtest.SUMMARY_KEYS
+    )
+
+
+def check_sweep(matrix, window):
+    """`sweep` (en el proceso, con procesos y desde varios hilos) contra llamadas directas a `backtest`."""
+    configurations = backtest_configurations()
+    expected = [backtest.backtest(matrix.returns, dates=matrix.dates, **configuration) for configuration in configurations]
+    error = 0.0
+    for max_workers in (1, 2):
+        # Con dos procesos se fuerza el camino en paralelo aunque el trabajo sea pequeño
+        minimum, backtest.PARALLEL_MIN_CELLS = backtest.PARALLEL_MIN_CELLS, 0
+        try:
+            results = backtest.sweep(matrix.returns, matrix.dates, configurations, max_workers=max_workers)
+        finally:
+            backtest.PARALLEL_MIN_CELLS = minimum
+        error = max(error, sweep_error(results, expected))
+
+    # Los hilos alternan entre dos matrices con distinto número de tickers: ninguno debe ver los datos de otro
+    subset = matrix.select(TICKERS[:3])
+    small = [{**configuration, "weights": WEIGHTS[:3]} for configuration in configurations]
+    small_expected = [backtest.backtest(subset.returns, dates=subset.dates, **configuration) for configuration in small]
+    jobs = [(matrix, configurations, expected), (subset, small, small_expected)] * (THREADS // 2)
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        futures = [(pool.submit(backtest.sweep, data.returns, data.dates, grid, max_workers=1), reference)
+                   for data, grid, reference in jobs]
+        for future, reference in futures:
+            try:
+                error = max(error, sweep_error(future.result(), reference))
+            except (IndexError, ValueError):
+                # Configuraciones de una sesión aplicadas a la matriz de otra
+                error = np.inf
+    return error
+
+
+CHECKS = {
+    "covarianza muestral vs pandas": check_sample_covariance,
+    "covarianza EWMA vs pandas": check_ewma_covariance,
+    "Ledoit-Wolf vs fórmula directa": check_ledoit_wolf,
+    "backtest vs bucle día por día": check_backtest,
+    "sweep vs backtest directo": check_sweep,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5, help="Años de histórico sintético")
+    parser.add_argument("--window", type=int, default=63, help="Ventana de las covarianzas móviles")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Error relativo máximo aceptado")
+    args = parser.parse_args()
+
+    provider = SyntheticProvider(TICKERS, args.years, gap_rate=0.02)
+    frames = {ticker: provider.history(ticker) for ticker in TICKERS}
+    # Un ETF que empieza a cotizar más tarde y otro con un hueco largo, que queda en NaN
+    frames["EEM"] = frames["EEM"].iloc[LATE_LISTING:]
+    frames["TLT"] = frames["TLT"].drop(frames["TLT"].index[LONG_GAP])
+    matrix = PriceMatrix.from_frames(frames, TICKERS)
+
+    failures = []
+    for name, check in CHECKS.items():
+        error = check(matrix, args.window)
+        flag = "" if error <= args.tolerance else "  FALLA"
+        if flag:
+            failures.append(name)
+        print(f"{name:<40} error relativo {error:.2e}{flag}")
+    if failures:
+        print(f"{len(failures)} comprobaciones superan la tolerancia de {args.tolerance:.0e}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class LRUCache:
+    """Caché en memoria con desalojo del elemento usado hace más tiempo.
+
+    Es segura entre hilos, de modo que puede compartirse entre todas las
+    sesiones de Streamlit de un mismo proceso.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Devuelve el valor de `key` o lo calcula y guarda si no estaba (los `None` no se guardan)."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _update_hash(digest, value):
+    if hasattr(value, "fingerprint"):
+        digest.update(value.fingerprint.encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(str((value.dtype, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest.update(repr(getattr(value, "columns", getattr(value, "name", None))).encode())
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            _update_hash(digest, key)
+            _update_hash(digest, value[key])
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _update_hash(digest, item)
+        digest.update(b"]")
+    else:
+        digest.update(repr(value).encode())
+    digest.update(b"|")
+
+
+def hash_key(*parts):
+    """Huella estable de los datos y parámetros de entrada, para usarla como clave de caché.
+
+    Los objetos que exponen `fingerprint` (como `PriceMatrix`) aportan esa
+    huella en lugar de volver a recorrer sus datos.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update_hash(digest, part)
+    return digest.hexdigest()
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from indicators import _ExponentialAverage, _RollingSum
+from portfolio import TRADING_DAYS, normalize_weights
+
+# Estimadores disponibles: muestral móvil, media exponencial (RiskMetrics) y Ledoit-Wolf
+METHODS = ("sample", "ewma", "ledoit-wolf")
+
+# Filas que se procesan a la vez; acota la memoria intermedia a BLOCK_SIZE x N²
+BLOCK_SIZE = 256
+
+
+class CovarianceEngine:
+    """Covarianzas móviles de todos los tickers de una matriz, para todas las fechas.
+
+    `covariance` es un tensor de solo lectura (fechas x tickers x tickers)
+    que se llena en una sola pasada: las sumas de la ventana se actualizan
+    en O(1) por fecha y par de tickers, vectorizadas sobre todos los pares.
+
+    - `"sample"`: covarianza muestral de los últimos `window` rendimientos.
+      Un par queda en NaN mientras alguno de los dos no tenga la ventana
+      completa.
+    - `"ewma"`: media exponencial de r_i·r_j con `span=window` (rendimientos
+      de media cero, como RiskMetrics). Arranca con el primer rendimiento de
+      cada ticker.
+    - `"ledoit-wolf"`: covarianza muestral encogida hacia μ·I con la
+      intensidad de Ledoit y Wolf (2004), calculada en cada fecha sobre los
+      tickers con ventana completa. Los momentos de cuarto orden también se
+      obtienen de sumas móviles, así que no hace falta recorrer la ventana.
+
+    Todas las variantes usan la escala de la covarianza muestral (ddof=1).
+    """
+
+    def __init__(self, matrix, window=63, method="sample", block_size=BLOCK_SIZE):
+        if method not in METHODS:
+            raise ValueError(f"Método de covarianza no soportado: {method}")
+        if window < 2:
+            raise ValueError("La ventana debe tener al menos dos observaciones.")
+        self.tickers = list(matrix.tickers)
+        self.dates = matrix.dates
+        self.window = window
+        self.method = method
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+        n = len(self.tickers)
+        returns = matrix.returns
+        if method == "ewma":
+            # Rendimientos sin centrar: la media de toda la muestra usaría datos posteriores a cada fecha
+            centered = returns
+        else:
+            # Las ventanas se vuelven a centrar, así que restar la media global no cambia la
+            # covarianza (ni mira hacia adelante) y reduce la cancelación numérica
+            counts = (~np.isnan(returns)).sum(axis=0)
+            means = np.divide(np.nansum(returns, axis=0), counts, out=np.zeros(n), where=counts > 0)
+            centered = returns - means
+
+        self.covariance = np.full((len(self.dates), n, n), np.nan)
+        self.shrinkage = np.full(len(self.dates), np.nan) if method == "ledoit-wolf" else None
+        if method == "ewma":
+            self._average = _ExponentialAverage(2 / (window + 1))
+        else:
+            self._sums = _RollingSum(window)
+            self._cross = _RollingSum(window)
+            if method == "ledoit-wolf":
+                self._third = _RollingSum(window)
+                self._fourth = _RollingSum(window)
+        for start in range(0, len(self.dates), block_size):
+            rows = slice(start, start + block_size)
+            self.covariance[rows] = self._update(centered[rows], rows)
+        self.covariance.flags.writeable = False
+
+    def _update(self, block, rows):
+        m, n = block.shape
+        products = (block[:, :, None] * block[:, None, :]).reshape(m, n * n)
+        if self.method == "ewma":
+            return self._average.update(products).reshape(m, n, n)
+
+        w = self.window
+        sums, _ = self._sums.update(block)
+        cross, counts = self._cross.update(products)
+        full = counts.reshape(m, n, n) == w
+        # Suma de productos cruzados centrados con la media de la ventana
+        scatter = cross.reshape(m, n, n) - sums[:, :, None] * sums[:, None, :] / w
+        covariance = np.where(full, scatter / (w - 1), np.nan)
+        if self.method == "sample":
+            return covariance
+
+        # Σ (x_i - m_i)² (x_j - m_j)² desarrollado en sumas móviles de potencias
+        third, _ = self._third.update((block[:, :, None] ** 2 * block[:, None, :]).reshape(m, n * n))
+        fourth, _ = self._fourth.update(products ** 2)
+        cross = cross.reshape(m, n, n)
+        third = third.reshape(m, n, n)
+        mean = sums / w
+        mi, mj = mean[:, :, None], mean[:, None, :]
+        squares = np.diagonal(cross, axis1=1, axis2=2)
+        centered_fourth = (
+            fourth.reshape(m, n, n) - 2 * mj * third - 2 * mi * third.transpose(0, 2, 1)
+            + mj ** 2 * squares[:, :, None] + mi ** 2 * squares[:, None, :]
+            + 4 * mi * mj * cross - 3 * w * mi ** 2 * mj ** 2
+        )
+        shrunk, self.shrinkage[rows] = _ledoit_wolf(covariance, centered_fourth, full, w)
+        return shrunk
+
+    @property
+    def end_date(self):
+        return self.dates[-1] if len(self.dates) else None
+
+    def _row(self, end):
+        """Índice de la última fecha no posterior a `end` (la última si `end` es None)."""
+        if not len(self.dates):
+            raise ValueError("No hay fechas para calcular la covarianza.")
+        if end is None:
+            return len(self.dates) - 1
+        row = self.dates.searchsorted(pd.Timestamp(end), side="right") - 1
+        if row < 0:
+            raise ValueError(f"No hay datos anteriores a {end}.")
+        return row
+
+    def _columns(self, tickers):
+        return [self._positions[ticker] for ticker in (self.tickers if tickers is None else tickers)]
+
+    def covariance_at(self, end=None, tickers=None):
+        """Matriz de covarianza (diaria) de la ventana que termina en `end`."""
+        columns = self._columns(tickers)
+        values = self.covariance[self._row(end)][np.ix_(columns, columns)]
+        labels = [self.tickers[i] for i in columns]
+        return pd.DataFrame(values, index=labels, columns=labels)
+
+    def correlation_at(self, end=None, tickers=None):
+        covariance = self.covariance_at(end, tickers)
+        std = np.sqrt(np.diag(covariance.to_numpy()))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance.to_numpy() / np.outer(std, std)
+        np.fill_diagonal(correlation, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(np.clip(correlation, -1.0, 1.0), index=covariance.index, columns=covariance.columns)
+
+    def rolling_correlation(self, first, second):
+        """Serie de la correlación móvil entre dos tickers."""
+        i, j = self._positions[first], self._positions[second]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = self.covariance[:, i, j] / np.sqrt(self.covariance[:, i, i] * self.covariance[:, j, j])
+        return pd.Series(values, index=self.dates, name=f"{first}/{second}")
+
+    def portfolio_volatility(self, allocations, end=None, periods_per_year=TRADING_DAYS):
+        """Volatilidad anualizada de una cartera ({ticker: porcentaje}) con la covarianza de `end`.
+
+        Devuelve None si algún ticker con peso no tiene covarianza en esa fecha.
+        """
+        held = [ticker for ticker, allocation in allocations.items() if allocation > 0]
+        weights = normalize_weights([allocations[ticker] for ticker in held])
+        covariance = self.covariance_at(end, held).to_numpy()
+        if np.isnan(covariance).any():
+            return None
+        return float(np.sqrt(max(weights @ covariance @ weights, 0.0) * periods_per_year))
+
+
+def _ledoit_wolf(covariance, fourth, full, window):
+    """Encoge cada covarianza del bloque hacia μ·I; devuelve (covarianzas, intensidades).
+
+    Sigue la fórmula de Ledoit-Wolf (2004) tal como la implementa
+    scikit-learn, restringida en cada fecha a los tickers con ventana completa.
+    """
+    n = window
+    valid = np.diagonal(full, axis1=1, axis2=2)
+    pairs = valid[:, :, None] & valid[:, None, :]
+    p = valid.sum(axis=1)
+    # Covarianza empírica (dividida entre n) con ceros fuera de los tickers válidos
+    empirical = np.where(pairs, covariance * (n - 1) / n, 0.0)
+    trace = np.trace(empirical, axis1=1, axis2=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = np.where(p > 0, trace / p, 0.0)
+        delta_ = (empirical ** 2).sum(axis=(1, 2))
+        beta_ = np.where(pairs, fourth, 0.0).sum(axis=(1, 2))
+        beta = (beta_ / n - delta_) / (p * n)
+        delta = (delta_ - 2 * mu * trace + p * mu ** 2) / p
+        shrinkage = np.where(delta > 0, np.minimum(beta, delta) / delta, 0.0)
+    shrinkage = np.where(p > 0, np.clip(shrinkage, 0.0, 1.0), np.nan)
+
+    s = np.nan_to_num(shrinkage)[:, None, None]
+    target = (mu * n / (n - 1))[:, None, None] * np.eye(covariance.shape[1])
+    shrunk = np.where(pairs, (1 - s) * covariance + s * target, np.nan)
+    return shrunk, shrinkage
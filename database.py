@@ -0,0 +1,117 @@
+import csv
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = "allianz_patrimonial.db"
+USERS_CSV = "users.csv"
+
+# Conexiones SQLite reutilizables compartidas por todas las sesiones
+POOL_SIZE = 4
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _create_users(conn):
+    """Crea la tabla de usuarios si falta e importa una sola vez `users.csv`."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
+    if os.path.exists(USERS_CSV):
+        with open(USERS_CSV, newline="", encoding="utf-8") as f:
+            rows = [(row["username"], row["password"]) for row in csv.DictReader(f) if row.get("username")]
+        conn.executemany("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", rows)
+
+
+def _add_metric_snapshots(conn):
+    """Añade a `etf_performance` el período y la fecha de cada instantánea de métricas."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS etf_performance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            average_return REAL,
+            volatility REAL,
+            cumulative_return REAL,
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(etf_performance)")}
+    if "period" not in columns:
+        conn.execute("ALTER TABLE etf_performance ADD COLUMN period TEXT")
+    if "snapshot_date" not in columns:
+        conn.execute("ALTER TABLE etf_performance ADD COLUMN snapshot_date TEXT")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_etf_performance_snapshot
+        ON etf_performance (period, snapshot_date, ticker)
+    """)
+
+
+def _add_named_portfolios(conn):
+    """Permite varias carteras con nombre por usuario en `user_investments`."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_investments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            etf_ticker TEXT NOT NULL,
+            allocation REAL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(user_investments)")}
+    if "portfolio_name" not in columns:
+        conn.execute("ALTER TABLE user_investments ADD COLUMN portfolio_name TEXT NOT NULL DEFAULT 'Principal'")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_user_investments_portfolio
+        ON user_investments (user_id, portfolio_name, etf_ticker)
+    """)
+
+
+# Migraciones en orden; PRAGMA user_version guarda cuántas se han aplicado
+MIGRATIONS = [_create_users, _add_metric_snapshots, _add_named_portfolios]
+
+
+def _migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def get_connection():
+    """Toma una conexión del pool (o abre una nueva) y la devuelve al terminar.
+
+    La primera conexión del proceso aplica las migraciones pendientes.
+    """
+    global _schema_ready
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        if not _schema_ready:
+            with _schema_lock:
+                if not _schema_ready:
+                    _migrate(conn)
+                    _schema_ready = True
+        yield conn
+    finally:
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
@@ -0,0 +1,43 @@
+# Períodos que se muestran en la aplicación y su equivalente en Yahoo Finance
+PERIOD_MAPPING = {
+    "1 año": "1y",
+    "3 años": "3y",
+    "5 años": "5y",
+    "10 años": "10y",
+    "Desde inicio de año": "ytd"
+}
+
+# Diccionario con descripciones para los ETFs
+etf_descriptions = {
+    "FXI": "iShares China Large-Cap ETF (Empresas chinas grandes)",
+    "EWT": "iShares MSCI Taiwan ETF (Mercado taiwanés)",
+    "IWM": "iShares Russell 2000 ETF (Empresas estadounidenses pequeñas)",
+    "EWZ": "iShares MSCI Brazil ETF (Mercado brasileño)",
+    "EWU": "iShares MSCI United Kingdom ETF (Mercado del Reino Unido)",
+    "XLF": "Financial Select Sector SPDR Fund (Sector financiero estadounidense)",
+    "BKF": "iShares MSCI BRIC ETF (Mercados emergentes: Brasil, Rusia, India, China)",
+    "EWY": "iShares MSCI South Korea ETF (Mercado surcoreano)",
+    "AGG": "iShares Core U.S. Aggregate Bond ETF (Bonos agregados de EE.UU.)",
+    "EEM": "iShares MSCI Emerging Markets ETF (Mercados emergentes)",
+    "EZU": "iShares MSCI Eurozone ETF (Zona Euro)",
+    "GLD": "SPDR Gold Trust (Oro)",
+    "QQQ": "Invesco QQQ Trust (NASDAQ 100, tecnología estadounidense)",
+    "AAXJ": "iShares MSCI All Country Asia ex Japan ETF (Asia excluyendo Japón)",
+    "SHY": "iShares 1-3 Year Treasury Bond ETF (Bonos del tesoro a corto plazo)",
+    "ACWI": "iShares MSCI ACWI ETF (Mercados globales desarrollados y emergentes)",
+    "SLV": "iShares Silver Trust (Plata)",
+    "EWH": "iShares MSCI Hong Kong ETF (Mercado de Hong Kong)",
+    "SPY": "SPDR S&P 500 ETF Trust (S&P 500, mercado estadounidense)",
+    "EWJ": "iShares MSCI Japan ETF (Mercado japonés)",
+    "IBGL": "iShares International Treasury Bond ETF (Bonos internacionales)",
+    "DIA": "SPDR Dow Jones Industrial Average ETF Trust (Dow Jones)",
+    "EWQ": "iShares MSCI France ETF (Mercado francés)",
+    "XOP": "SPDR S&P Oil & Gas Exploration & Production ETF (Exploración y producción de petróleo y gas)",
+    "VWO": "Vanguard FTSE Emerging Markets ETF (Mercados emergentes)",
+    "EWA": "iShares MSCI Australia ETF (Mercado australiano)",
+    "EWC": "iShares MSCI Canada ETF (Mercado canadiense)",
+    "ILF": "iShares Latin America 40 ETF (Mercado latinoamericano)",
+    "XLV": "Health Care Select Sector SPDR Fund (Sector salud estadounidense)",
+    "EWG": "iShares MSCI Germany ETF (Mercado alemán)",
+    "ITB": "iShares U.S. Home Construction ETF (Construcción de viviendas en EE.UU.)"
+}
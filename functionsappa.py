@@ -1,10 +1,47 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
 import streamlit as st
+from cache_utils import LRUCache, hash_key
+from price_store import get_price_store, period_start
+from market_cache import get_market_cache
+from refresher import is_current
+from etf_catalog import PERIOD_MAPPING, etf_descriptions
+from price_matrix import PriceMatrix, matrix_metrics
+from montecarlo import simulate_monte_carlo
+from portfolio import portfolio_metrics
+from indicators import IndicatorSet
+from covariance import CovarianceEngine
+from optimizer import annualized_inputs, optimal_portfolios
+from backtest import backtest, sweep
+from metrics_snapshot import load_snapshot
+from instrumentation import record_miss, register_cache, timed
 
+# PNG ya renderizados, compartidos entre sesiones y ejecuciones del script
+_figure_cache = LRUCache(max_entries=64)
+
+# Valoraciones de carteras por (datos, asignaciones)
+_valuation_cache = LRUCache(max_entries=128)
+
+# Tensores de covarianza móvil del universo completo (~20 MB cada uno con 10 años)
+_covariance_cache = LRUCache(max_entries=6)
+
+# Carteras óptimas y frontera eficiente por (tickers, período, covarianza)
+_frontier_cache = LRUCache(max_entries=64)
+
+# Backtests por (datos, cartera, parámetros)
+_backtest_cache = LRUCache(max_entries=32)
+
+# Histórico sobre el que se calculan las covarianzas móviles, sin importar el período elegido
+COVARIANCE_PERIOD = "10 años"
+
+register_cache("render_figure (PNG)", _figure_cache)
+register_cache("value_portfolio (valoraciones)", _valuation_cache)
+register_cache("get_covariance_engine (tensores)", _covariance_cache)
+register_cache("get_optimal_portfolios (fronteras)", _frontier_cache)
+register_cache("run_backtest (backtests)", _backtest_cache)
+
+@timed
 def validate_data(df, ticker):
     """Valida si los datos descargados son suficientes para análisis."""
     if df.empty:
@@ -15,29 +52,69 @@ def validate_data(df, ticker):
         return False
     return True
 
-@st.cache_data
+@timed
+def validate_ticker(matrix, ticker):
+    """Valida si la matriz de precios tiene cierres para el ticker indicado."""
+    if ticker not in matrix.valid_tickers:
+        st.warning(f"El ETF {ticker} no tiene datos disponibles para el período seleccionado.")
+        return False
+    return True
+
+@timed
+def _current_snapshot():
+    """Versión publicada de la caché compartida, o None si no hay o está vencida."""
+    snapshot = get_market_cache().snapshot()
+    return snapshot if snapshot is not None and is_current(snapshot) else None
+
+@timed
 def get_etf_data(tickers, period="5y", start_date=None, end_date=None):
-    """Obtiene datos históricos para los tickers seleccionados desde Yahoo Finance."""
-    period_mapping = {
-        "1 año": "1y",
-        "3 años": "3y",
-        "5 años": "5y",
-        "10 años": "10y",
-        "Desde inicio de año": "ytd"
-    }
-    if period in period_mapping:
-        period = period_mapping[period]
+    """Obtiene datos históricos para los tickers seleccionados.
+
+    Si todos los tickers están en la caché compartida que mantiene
+    `refresher` y esta incluye el último cierre, se leen de ahí sin copiarlos
+    y sin consultar la red. Si no (por ejemplo, porque el programador no
+    está corriendo), se sirven desde el almacén local (`price_store`), que
+    solo consulta a Yahoo Finance por las barras que aún no tiene guardadas.
+    """
+    snapshot = _current_snapshot()
+    if snapshot is None or not all(ticker in snapshot for ticker in tickers):
+        return _get_stored_data(tickers, period, start_date, end_date)
+    if period in PERIOD_MAPPING:
+        period = PERIOD_MAPPING[period]
+    if start_date and end_date:
+        return _collect_histories(tickers, lambda ticker: snapshot.read(ticker, start=start_date, end=end_date))
+    start = period_start(period)
+    return _collect_histories(tickers, lambda ticker: snapshot.read(ticker, start=start))
+
+@timed(cached=True)
+@st.cache_data(ttl=3600)
+def _get_stored_data(tickers, period="5y", start_date=None, end_date=None):
+    """Históricos desde el almacén local, para tickers que aún no están en la caché compartida."""
+    record_miss("_get_stored_data")
+    if period in PERIOD_MAPPING:
+        period = PERIOD_MAPPING[period]
     
+    store = get_price_store()
+    # Todos los tickers pendientes se actualizan juntos en un lote o en paralelo
+    errors = store.update_many(tickers)
+
+    def read(ticker):
+        if ticker in errors:
+            raise errors[ticker]
+        if start_date and end_date:
+            return store.read(ticker, start=start_date, end=end_date)
+        return store.read(ticker, start=period_start(period))
+
+    return _collect_histories(tickers, read)
+
+@timed
+def _collect_histories(tickers, read):
+    """Lee el histórico de cada ticker con `read` y avisa de los que no tienen datos."""
     data = {}
     valid_tickers = []
     for ticker in tickers:
         try:
-            etf = yf.Ticker(ticker)
-            if start_date and end_date:
-                history = etf.history(start=start_date, end=end_date)
-            else:
-                history = etf.history(period=period)
-
+            history = read(ticker)
             if history.empty or 'Close' not in history.columns:
                 st.warning(f"No se encontraron datos válidos para {ticker}.")
                 data[ticker] = pd.DataFrame()
@@ -53,6 +130,141 @@ def get_etf_data(tickers, period="5y", start_date=None, end_date=None):
     
     return data
 
+@timed
+def get_price_matrix(tickers, period="5y", start_date=None, end_date=None):
+    """Construye una sola vez por carga de datos la matriz alineada de cierres.
+
+    La matriz es de solo lectura y se comparte entre todas las sesiones y
+    análisis, sin copiarse en cada ejecución del script. Cada versión
+    publicada de la caché compartida produce una matriz nueva.
+    """
+    snapshot = _current_snapshot()
+    version = snapshot.version if snapshot is not None else None
+    return _build_price_matrix(tickers, period, start_date, end_date, version)
+
+@timed(cached=True)
+@st.cache_resource(ttl=3600, max_entries=32)
+def _build_price_matrix(tickers, period, start_date, end_date, version):
+    record_miss("_build_price_matrix")
+    data = get_etf_data(tickers, period=period, start_date=start_date, end_date=end_date)
+    return PriceMatrix.from_frames(data, list(tickers))
+
+@timed(cached=True)
+@st.cache_resource(max_entries=32)
+def get_indicator_set(tickers, period="5y"):
+    """Indicadores técnicos persistentes por selección de tickers y período.
+
+    El objeto se conserva entre ejecuciones; basta con llamar a `update` con
+    la matriz actual para que procese solo las barras nuevas (o reconstruya
+    el estado si cambiaron precios ya procesados).
+    """
+    record_miss("get_indicator_set")
+    return IndicatorSet(list(tickers))
+
+@timed
+def get_covariance_engine(window=63, method="sample"):
+    """Covarianzas móviles de todos los ETFs del catálogo, compartidas por la app.
+
+    Se calculan una sola vez por (estimador, ventana, fecha final) sobre los
+    últimos `COVARIANCE_PERIOD`; la matriz de correlación, el riesgo de la
+    cartera y el optimizador leen del mismo tensor. La huella de los precios
+    también forma parte de la clave, por si se corrigen datos ya guardados.
+    """
+    matrix = get_price_matrix(list(etf_descriptions), period=COVARIANCE_PERIOD)
+    end_date = matrix.dates[-1] if len(matrix) else None
+    key = (method, window, end_date, matrix.fingerprint)
+    return _covariance_cache.get_or_compute(key, lambda: CovarianceEngine(matrix, window, method))
+
+@timed(cached=True)
+@st.cache_data(ttl=600)
+def get_metrics_snapshot(period="1y"):
+    """Lee la instantánea vigente de métricas precalculadas (None si no hay o está vencida)."""
+    record_miss("get_metrics_snapshot")
+    if period in PERIOD_MAPPING:
+        period = PERIOD_MAPPING[period]
+    return load_snapshot(period)
+
+@timed
+def value_portfolio(matrix, allocations):
+    """Métricas de una cartera ({ticker: porcentaje}) sobre la matriz de precios.
+
+    El resultado se guarda por cartera y datos, así que volver a una cartera
+    ya valorada (por ejemplo, la que se carga al iniciar sesión) no repite
+    el cálculo.
+    """
+    allocations = {ticker: allocation for ticker, allocation in allocations.items() if allocation > 0}
+    key = hash_key(matrix, sorted(allocations.items()))
+
+    def compute():
+        weights = [allocations.get(ticker, 0) for ticker in matrix.tickers]
+        return portfolio_metrics(weights, matrix.returns)
+
+    return _valuation_cache.get_or_compute(key, compute)
+
+@timed
+def get_optimal_portfolios(matrix, tickers, period, engine=None):
+    """Carteras de mínima varianza, máximo Sharpe y paridad de riesgo de los tickers con datos.
+
+    Los rendimientos esperados salen de la matriz del período; la covarianza,
+    del motor de covarianzas móviles si se indica y cubre a todos los
+    tickers (si no, de los rendimientos del período). El resultado se
+    guarda por conjunto de tickers, período y covarianza. Devuelve None si
+    hay menos de dos tickers o no hay suficientes datos comunes.
+    """
+    tickers = sorted(ticker for ticker in set(tickers) if ticker in matrix.valid_tickers)
+    if len(tickers) < 2:
+        return None
+    source = None if engine is None else (engine.method, engine.window, engine.end_date)
+    key = hash_key(tickers, period, source, matrix)
+
+    def compute():
+        returns = matrix.select(tickers).returns
+        covariance = None
+        if engine is not None and all(ticker in engine.tickers for ticker in tickers):
+            covariance = engine.covariance_at(tickers=tickers).to_numpy()
+            if np.isnan(covariance).any():
+                covariance = None
+        try:
+            mean_returns, covariance = annualized_inputs(returns, covariance)
+        except ValueError:
+            return None
+        return {
+            'Tickers': tickers, 'Mean Returns': mean_returns, 'Covariance': covariance,
+            **optimal_portfolios(mean_returns, covariance),
+        }
+
+    return _frontier_cache.get_or_compute(key, compute)
+
+@timed
+def run_backtest(matrix, allocations, **params):
+    """Backtest de una cartera ({ticker: porcentaje}) sobre la matriz de precios.
+
+    `params` son los argumentos de `backtest.backtest` (aportaciones,
+    rebalanceo, costos...). El resultado se guarda por datos, cartera y
+    parámetros; devuelve None si no hay fechas comunes a todos los activos.
+    """
+    allocations = {ticker: allocation for ticker, allocation in allocations.items() if allocation > 0 and ticker in matrix}
+    if not allocations or matrix.empty:
+        return None
+    key = hash_key(matrix, sorted(allocations.items()), sorted(params.items()))
+
+    def compute():
+        weights = [allocations.get(ticker, 0) for ticker in matrix.tickers]
+        try:
+            return backtest(matrix.returns, weights, matrix.dates, **params)
+        except ValueError:
+            return None
+
+    return _backtest_cache.get_or_compute(key, compute)
+
+@timed
+def run_backtest_sweep(matrix, allocations, configurations):
+    """Ejecuta un backtest por configuración (en paralelo si son muchos) y devuelve un resumen por fila."""
+    weights = [allocations.get(ticker, 0) for ticker in matrix.tickers]
+    results = sweep(matrix.returns, matrix.dates, [{'weights': weights, **configuration} for configuration in configurations])
+    return pd.DataFrame([{key: value for key, value in result.items() if key != 'weights'} for result in results])
+
+@timed
 def calculate_metrics(df):
     """Calcula métricas clave para un DataFrame de precios."""
     if df.empty or 'Close' not in df.columns:
@@ -61,57 +273,211 @@ def calculate_metrics(df):
     returns = df['Close'].pct_change().dropna()
     avg_return = np.mean(returns) if not returns.empty else None
     volatility = np.std(returns) if not returns.empty else None
-    cumulative_return = (df['Close'][-1] / df['Close'][0]) - 1 if not df.empty else None
+    cumulative_return = (df['Close'].iloc[-1] / df['Close'].iloc[0]) - 1 if not df.empty else None
     return {'Average Return': avg_return, 'Volatility': volatility, 'Cumulative Return': cumulative_return}
 
+@timed
+def calculate_matrix_metrics(matrix):
+    """Calcula las métricas de `calculate_metrics` para todos los tickers de la matriz a la vez."""
+    return matrix_metrics(matrix)
+
+@timed
+def new_figure(**kwargs):
+    """Crea una figura de Matplotlib (sin pyplot); Matplotlib se importa al dibujar la primera."""
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+@timed
+def figure_to_png(fig):
+    """Renderiza una figura a PNG; la figura no pertenece a pyplot y se libera al salir."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
+
+@timed
+def render_figure(builder, *args, **kwargs):
+    """Devuelve el PNG de `builder(*args, **kwargs)` y lo reutiliza si los datos no cambiaron.
+
+    La clave es una huella de los argumentos, así que una nueva ejecución con
+    las mismas entradas no vuelve a construir ni a renderizar la figura.
+    """
+    key = hash_key(builder.__name__, args, kwargs)
+
+    def build():
+        fig = builder(*args, **kwargs)
+        return None if fig is None else figure_to_png(fig)
+
+    return _figure_cache.get_or_compute(key, build)
+
+@timed
+def warn_missing_tickers(matrix, tickers):
+    """Avisa de los tickers sin datos, que no aparecerán en las gráficas."""
+    valid_tickers = matrix.valid_tickers
+    for ticker in tickers:
+        if ticker not in valid_tickers:
+            st.warning(f"Datos faltantes para {ticker}. No se incluirá en la comparación.")
+
+@timed
 def plot_performance(df, title="Desempeño del ETF"):
     """Genera un gráfico de la historia de precios de un ETF."""
     if df.empty or 'Close' not in df.columns:
         st.warning(f"Datos insuficientes para graficar {title}.")
         return None
 
-    plt.figure(figsize=(12, 6))
-    plt.plot(df.index, df['Close'], label='Precio de Cierre', color='blue')
-    plt.title(title)
-    plt.xlabel("Fecha")
-    plt.ylabel("Precio")
-    plt.legend()
-    plt.grid()
-    return plt
+    fig = new_figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.plot(df.index, df['Close'], label='Precio de Cierre', color='blue')
+    ax.set_title(title)
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Precio")
+    ax.legend()
+    ax.grid()
+    return fig
 
-def plot_comparative_performance(data, tickers):
+@timed
+def plot_comparative_performance(matrix, tickers):
     """Genera un gráfico comparativo del desempeño de múltiples ETFs."""
-    plt.figure(figsize=(12, 6))
+    fig = new_figure(figsize=(12, 6))
+    ax = fig.subplots()
+    valid_tickers = matrix.valid_tickers
     for ticker in tickers:
-        if ticker in data and not data[ticker].empty:
-            plt.plot(data[ticker].index, data[ticker]['Close'], label=ticker)
-        else:
-            st.warning(f"Datos faltantes para {ticker}. No se incluirá en la comparación.")
-    plt.title("Desempeño Comparativo de los ETFs Seleccionados")
-    plt.xlabel("Fecha")
-    plt.ylabel("Precio")
-    plt.legend()
-    plt.grid()
-    return plt
-
-def plot_correlation_heatmap(data, tickers):
-    """Genera una matriz de correlación entre los ETFs seleccionados."""
-    valid_tickers = [ticker for ticker in tickers if not data[ticker].empty]
+        if ticker in valid_tickers:
+            ax.plot(matrix.dates, matrix.close[:, matrix.position(ticker)], label=ticker)
+    ax.set_title("Desempeño Comparativo de los ETFs Seleccionados")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Precio")
+    ax.legend()
+    ax.grid()
+    return fig
+
+@timed
+def plot_correlation_heatmap(matrix, tickers, correlation=None):
+    """Genera una matriz de correlación entre los ETFs seleccionados.
+
+    Sin `correlation` se usa la de todo el período de la matriz; con ella
+    (por ejemplo, `CovarianceEngine.correlation_at`) se grafica esa matriz.
+    """
+    valid_tickers = [ticker for ticker in tickers if ticker in matrix.valid_tickers]
     if not valid_tickers:
         st.warning("No hay datos válidos para generar la matriz de correlación.")
         return None
 
-    combined_data = pd.concat([data[ticker]['Close'] for ticker in valid_tickers], axis=1)
-    combined_data.columns = valid_tickers
+    if correlation is None:
+        correlation = matrix.correlation()
+    correlation = correlation.loc[valid_tickers, valid_tickers]
+    import seaborn as sns
+    fig = new_figure(figsize=(10, 8))
+    ax = fig.subplots()
+    sns.heatmap(correlation, annot=True, cmap='coolwarm', fmt='.2f', square=True, cbar_kws={"shrink": .8}, ax=ax)
+    ax.set_title("Matriz de Correlación")
+    return fig
+
+@timed
+def plot_technical_indicators(indicators, matrix, ticker):
+    """Genera el panel de indicadores técnicos (precio, RSI, MACD y volatilidad) de un ETF."""
+    close = matrix.close_series(ticker)
+    if close.empty:
+        st.warning(f"Datos insuficientes para graficar los indicadores de {ticker}.")
+        return None
+
+    def series(name):
+        return indicators.series(name, ticker).loc[close.index[0]:]
 
-    correlation = combined_data.pct_change().corr()
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(correlation, annot=True, cmap='coolwarm', fmt='.2f', square=True, cbar_kws={"shrink": .8})
-    plt.title("Matriz de Correlación")
-    return plt
+    fig = new_figure(figsize=(12, 12))
+    ax_price, ax_rsi, ax_macd, ax_vol = fig.subplots(4, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1, 1, 1]})
+    ax_price.plot(close, label='Precio de Cierre', color='blue')
+    ax_price.plot(series("SMA 20"), label='Media Móvil (20 días)', color='orange')
+    ax_price.plot(series("SMA 50"), label='Media Móvil (50 días)', color='green')
+    ax_price.plot(series("EMA 20"), label='Media Exponencial (20 días)', color='purple', linestyle='--')
+    ax_price.fill_between(close.index, series("Bollinger Inferior"), series("Bollinger Superior"),
+                          color='gray', alpha=0.2, label='Bandas de Bollinger')
+    ax_price.set_title(f"Indicadores Técnicos de {ticker}")
+    ax_price.set_ylabel("Precio")
+    ax_price.legend()
+    ax_price.grid()
 
+    ax_rsi.plot(series("RSI 14"), color='brown')
+    ax_rsi.axhline(70, color='red', linestyle='--')
+    ax_rsi.axhline(30, color='green', linestyle='--')
+    ax_rsi.set_ylabel("RSI (14)")
+    ax_rsi.grid()
+
+    ax_macd.plot(series("MACD"), label='MACD', color='blue')
+    ax_macd.plot(series("MACD Señal"), label='Señal', color='orange')
+    ax_macd.bar(close.index, series("MACD Histograma"), color='gray', alpha=0.5)
+    ax_macd.set_ylabel("MACD")
+    ax_macd.legend()
+    ax_macd.grid()
+
+    ax_vol.plot(series("Volatilidad 21d") * 100, label='Volatilidad (21 días)', color='red')
+    ax_vol.set_ylabel("Volatilidad (%)")
+    ax_vol.set_xlabel("Fecha")
+    ax_vol.grid()
+    return fig
+
+@timed
+def plot_projection(projection, ticker):
+    """Genera el gráfico de bandas de la proyección Monte Carlo."""
+    bands = projection['Percentiles']
+    fig = new_figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.fill_between(projection['Years'], bands[5], bands[95], alpha=0.3, label="Rango P5 - P95")
+    ax.plot(projection['Years'], bands[50], label="Mediana (P50)")
+    ax.set_title(f"Proyección de Crecimiento para {ticker}")
+    ax.set_xlabel("Años")
+    ax.set_ylabel("Monto Acumulado ($)")
+    ax.legend()
+    return fig
+
+@timed
+def plot_efficient_frontier(optimization, current=None):
+    """Grafica la frontera eficiente, las carteras óptimas y, si se indica, la cartera actual.
+
+    `current` es un par (volatilidad, rendimiento) anualizados.
+    """
+    frontier = optimization['Frontier']
+    fig = new_figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(frontier['Volatility'] * 100, frontier['Returns'] * 100, label="Frontera eficiente")
+    labels = {'Min Variance': "Mínima varianza", 'Max Sharpe': "Máximo Sharpe", 'Risk Parity': "Paridad de riesgo"}
+    for key, label in labels.items():
+        portfolio = optimization[key]
+        ax.scatter(portfolio['Annual Volatility'] * 100, portfolio['Annual Return'] * 100, label=label, zorder=3)
+    if current is not None:
+        ax.scatter(current[0] * 100, current[1] * 100, marker="*", s=200, color="black", label="Cartera actual", zorder=4)
+    ax.set_title("Frontera Eficiente")
+    ax.set_xlabel("Volatilidad Anual (%)")
+    ax.set_ylabel("Rendimiento Anual (%)")
+    ax.legend()
+    ax.grid()
+    return fig
+
+@timed
+def plot_backtest(result):
+    """Genera el gráfico del valor de la cartera del backtest frente a lo aportado, con su caída."""
+    dates = result['Dates']
+    contributed = result['Total Contributions'] - result['Contributions'].sum() + np.cumsum(result['Contributions'])
+    fig = new_figure(figsize=(12, 8))
+    ax, ax_drawdown = fig.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [3, 1]})
+    ax.plot(dates, result['Equity'], label="Valor de la cartera")
+    ax.plot(dates, contributed, linestyle="--", label="Monto aportado")
+    rebalanced = result['Rebalanced']
+    if 0 < rebalanced.sum() <= 60:
+        ax.scatter(dates[rebalanced], result['Equity'][rebalanced], s=12, color="gray", label="Rebalanceos", zorder=3)
+    ax.set_title("Backtest de la Cartera")
+    ax.set_ylabel("Valor ($)")
+    ax.legend()
+    ax.grid()
+    ax_drawdown.fill_between(dates, result['Drawdown'] * 100, 0, color="red", alpha=0.3)
+    ax_drawdown.set_ylabel("Caída (%)")
+    ax_drawdown.set_xlabel("Fecha")
+    ax_drawdown.grid()
+    return fig
+
+@timed
 def get_sector_allocation(ticker):
     """Obtiene la asignación sectorial de un ETF desde Yahoo Finance."""
+    import yfinance as yf
     try:
         etf = yf.Ticker(ticker)
         sector_weights = etf.fund_sector_weightings  # Obtener los pesos sectoriales
@@ -125,20 +491,23 @@ def get_sector_allocation(ticker):
         st.error(f"Error al obtener la asignación sectorial para {ticker}: {e}")
         return None
 
+@timed
 def plot_sector_allocation(sector_allocation):
     """Genera un gráfico de barras para la asignación sectorial."""
     if sector_allocation is None or sector_allocation.empty:
         st.warning("Datos insuficientes para graficar asignación sectorial.")
         return None
 
-    plt.figure(figsize=(8, 6))
-    plt.bar(sector_allocation['Sector'], sector_allocation['Asignación (%)'], color='skyblue')
-    plt.title("Asignación Sectorial")
-    plt.ylabel("Asignación (%)")
-    plt.xticks(rotation=45)
-    plt.grid(axis='y')
-    return plt
+    fig = new_figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.bar(sector_allocation['Sector'], sector_allocation['Asignación (%)'], color='skyblue')
+    ax.set_title("Asignación Sectorial")
+    ax.set_ylabel("Asignación (%)")
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(axis='y')
+    return fig
 
+@timed
 def plot_monetary_returns_pie(labels, values, total_investment):
     """Genera un gráfico de pastel para los retornos monetarios."""
     # Validar entradas
@@ -162,16 +531,28 @@ def plot_monetary_returns_pie(labels, values, total_investment):
         return None
 
     # Generar el gráfico
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig = new_figure(figsize=(10, 8))
+    ax = fig.subplots()
     wedges, texts, autotexts = ax.pie(
         filtered_values, labels=filtered_labels, autopct='%1.1f%%', startangle=90
     )
     for i, text in enumerate(texts):
         text.set_text(f"\n\n${values[i]:,.2f}\n({filtered_values[i]:.2f}%)")
-    plt.title('Distribución de Retornos Monetarios', fontsize=16)
-    plt.axis('equal')  # Asegurar que el gráfico sea circular
+    ax.set_title('Distribución de Retornos Monetarios', fontsize=16)
+    ax.axis('equal')  # Asegurar que el gráfico sea circular
     return fig
 
+@timed(cached=True)
+@st.cache_data(max_entries=64)
+def project_growth(initial_amount, periodic_contribution, daily_returns, years, n_paths=10000, method="bootstrap"):
+    """Proyección Monte Carlo con semilla fija para que los resultados sean estables entre ejecuciones."""
+    record_miss("project_growth")
+    return simulate_monte_carlo(
+        initial_amount, periodic_contribution, daily_returns, years,
+        n_paths=n_paths, method=method, seed=42
+    )
+
+@timed
 def simulate_long_term_growth(initial_amount, periodic_contribution, annual_return, years):
     """Simula el crecimiento de una inversión con contribuciones periódicas."""
     amounts = [initial_amount]
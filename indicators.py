@@ -0,0 +1,305 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from portfolio import TRADING_DAYS
+
+
+class _RollingSum:
+    """Suma y conteo de valores válidos en una ventana móvil, por columna.
+
+    Guarda solo las últimas `window - 1` filas, así que actualizar con `m`
+    filas nuevas cuesta O(m + window) sin importar la longitud del histórico.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._tail = None
+        self._tail_valid = None
+
+    def update(self, rows):
+        rows = np.asarray(rows, dtype="float64")
+        if self._tail is None:
+            self._tail = np.zeros((self.window - 1, rows.shape[1]))
+            self._tail_valid = np.zeros((self.window - 1, rows.shape[1]))
+        valid = ~np.isnan(rows)
+        values = np.vstack([self._tail, np.where(valid, rows, 0.0)])
+        counts = np.vstack([self._tail_valid, valid])
+        zeros = np.zeros((1, rows.shape[1]))
+        value_sums = np.cumsum(np.vstack([zeros, values]), axis=0)
+        count_sums = np.cumsum(np.vstack([zeros, counts]), axis=0)
+        sums = value_sums[self.window:] - value_sums[:-self.window]
+        valid_counts = count_sums[self.window:] - count_sums[:-self.window]
+        if self.window > 1:
+            self._tail = values[-(self.window - 1):]
+            self._tail_valid = counts[-(self.window - 1):]
+        return sums, valid_counts
+
+
+class _RollingMoments:
+    """Media y desviación estándar muestral en una ventana móvil."""
+
+    def __init__(self, window):
+        self.window = window
+        self._sum = _RollingSum(window)
+        self._squares = _RollingSum(window)
+
+    def update(self, rows):
+        rows = np.asarray(rows, dtype="float64")
+        sums, counts = self._sum.update(rows)
+        squares, _ = self._squares.update(rows ** 2)
+        full = counts == self.window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(full, sums / self.window, np.nan)
+            variance = (squares - self.window * mean ** 2) / (self.window - 1)
+        std = np.sqrt(np.where(full, np.maximum(variance, 0.0), np.nan))
+        return mean, std
+
+
+class _ExponentialAverage:
+    """Media exponencial recursiva (como `ewm(adjust=False)` de pandas).
+
+    Arranca con el primer valor válido de cada columna y conserva el último
+    valor cuando falta una observación.
+    """
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self._state = None
+
+    def update(self, rows):
+        rows = np.asarray(rows, dtype="float64")
+        if self._state is None:
+            self._state = np.full(rows.shape[1], np.nan)
+        out = np.empty_like(rows)
+        state = self._state
+        for i, row in enumerate(rows):
+            blended = np.where(np.isnan(state), row, self.alpha * row + (1 - self.alpha) * state)
+            state = np.where(np.isnan(row), state, blended)
+            out[i] = state
+        self._state = state
+        return out
+
+
+class Indicator:
+    """Indicador técnico incremental sobre una matriz de precios (fechas x tickers).
+
+    `update` recibe solo las filas nuevas y devuelve un diccionario con los
+    valores del indicador para esas filas; el estado necesario para
+    continuar la serie queda guardado en la instancia.
+    """
+
+    def update(self, close, high=None, low=None):
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    def __init__(self, window=20):
+        self.name = f"SMA {window}"
+        self.window = window
+        self._sum = _RollingSum(window)
+
+    def update(self, close, high=None, low=None):
+        sums, counts = self._sum.update(close)
+        with np.errstate(invalid="ignore"):
+            return {self.name: np.where(counts == self.window, sums / self.window, np.nan)}
+
+
+class EMA(Indicator):
+    def __init__(self, span=20):
+        self.name = f"EMA {span}"
+        self._average = _ExponentialAverage(2 / (span + 1))
+
+    def update(self, close, high=None, low=None):
+        return {self.name: self._average.update(close)}
+
+
+class RSI(Indicator):
+    """Índice de fuerza relativa con el suavizado de Wilder."""
+
+    def __init__(self, period=14):
+        self.name = f"RSI {period}"
+        self._gains = _ExponentialAverage(1 / period)
+        self._losses = _ExponentialAverage(1 / period)
+        self._previous = None
+
+    def update(self, close, high=None, low=None):
+        close = np.asarray(close, dtype="float64")
+        previous = np.full(close.shape[1], np.nan) if self._previous is None else self._previous
+        changes = np.diff(np.vstack([previous, close]), axis=0)
+        self._previous = close[-1]
+        gains = self._gains.update(np.where(np.isnan(changes), np.nan, np.maximum(changes, 0.0)))
+        losses = self._losses.update(np.where(np.isnan(changes), np.nan, np.maximum(-changes, 0.0)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rsi = 100 - 100 / (1 + gains / losses)
+        return {self.name: np.where(losses == 0, np.where(gains > 0, 100.0, np.nan), rsi)}
+
+
+class MACD(Indicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = _ExponentialAverage(2 / (fast + 1))
+        self._slow = _ExponentialAverage(2 / (slow + 1))
+        self._signal = _ExponentialAverage(2 / (signal + 1))
+
+    def update(self, close, high=None, low=None):
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(macd)
+        return {"MACD": macd, "MACD Señal": signal, "MACD Histograma": macd - signal}
+
+
+class BollingerBands(Indicator):
+    def __init__(self, window=20, width=2.0):
+        self.width = width
+        self._moments = _RollingMoments(window)
+
+    def update(self, close, high=None, low=None):
+        mean, std = self._moments.update(close)
+        return {
+            "Bollinger Media": mean,
+            "Bollinger Superior": mean + self.width * std,
+            "Bollinger Inferior": mean - self.width * std,
+        }
+
+
+class ATR(Indicator):
+    """Rango verdadero promedio con el suavizado de Wilder; requiere máximos y mínimos."""
+
+    def __init__(self, period=14):
+        self.name = f"ATR {period}"
+        self._average = _ExponentialAverage(1 / period)
+        self._previous = None
+
+    def update(self, close, high=None, low=None):
+        if high is None or low is None:
+            raise ValueError("El ATR necesita precios máximos y mínimos.")
+        close = np.asarray(close, dtype="float64")
+        previous = np.full(close.shape[1], np.nan) if self._previous is None else self._previous
+        previous_close = np.vstack([previous, close[:-1]])
+        self._previous = close[-1]
+        # fmax ignora el cierre previo faltante de la primera barra
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+        true_range[np.isnan(high - low)] = np.nan
+        return {self.name: self._average.update(true_range)}
+
+
+class RollingVolatility(Indicator):
+    """Volatilidad anualizada de los rendimientos diarios en una ventana móvil."""
+
+    def __init__(self, window=21, periods_per_year=TRADING_DAYS):
+        self.name = f"Volatilidad {window}d"
+        self.scale = np.sqrt(periods_per_year)
+        self._moments = _RollingMoments(window)
+        self._previous = None
+
+    def update(self, close, high=None, low=None):
+        close = np.asarray(close, dtype="float64")
+        previous = np.full(close.shape[1], np.nan) if self._previous is None else self._previous
+        returns = np.diff(np.vstack([previous, close]), axis=0) / np.vstack([previous, close[:-1]])
+        self._previous = close[-1]
+        _, std = self._moments.update(returns)
+        return {self.name: std * self.scale}
+
+
+def default_indicators():
+    return [
+        SMA(20), SMA(50), EMA(20), RSI(14), MACD(12, 26, 9),
+        BollingerBands(20, 2.0), ATR(14), RollingVolatility(21),
+    ]
+
+
+class _GrowingArray:
+    """Arreglo de filas con capacidad que se duplica, para anexar en O(1) amortizado."""
+
+    def __init__(self, n_columns):
+        self._data = np.empty((0, n_columns))
+        self._size = 0
+
+    def append(self, rows):
+        needed = self._size + len(rows)
+        if needed > len(self._data):
+            data = np.empty((max(needed, 2 * len(self._data)), self._data.shape[1]))
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:needed] = rows
+        self._size = needed
+
+    @property
+    def values(self):
+        return self._data[:self._size]
+
+
+class IndicatorSet:
+    """Calcula un conjunto de indicadores para todos los tickers de una matriz.
+
+    `update` procesa solo las fechas posteriores a la última ya calculada,
+    por lo que tras una actualización de datos el costo es proporcional a
+    las barras nuevas y no al histórico completo. Si la última barra ya
+    procesada cambió (el almacén vuelve a pedir la última barra y un
+    dividendo o split reajusta todo el histórico), el estado se reconstruye
+    desde cero con los precios nuevos.
+    """
+
+    def __init__(self, tickers, indicators=None):
+        self.tickers = list(tickers)
+        self._initial = copy.deepcopy(indicators if indicators is not None else default_indicators())
+        self._lock = threading.Lock()
+        self._generation = -1
+        self._reset()
+
+    def _reset(self):
+        self.indicators = copy.deepcopy(self._initial)
+        self.dates = None
+        self._values = {}
+        self._last_bar = None
+        self._generation += 1
+
+    def _last_bar_unchanged(self, matrix):
+        """True si `matrix` tiene la última fecha procesada con los mismos precios."""
+        position = matrix.dates.get_indexer([self.dates[-1]])[0]
+        if position < 0:
+            return False
+        current = [None if prices is None else prices[position] for prices in (matrix.close, matrix.high, matrix.low)]
+        return all(
+            (old is None) == (new is None) and (old is None or np.array_equal(old, new, equal_nan=True))
+            for old, new in zip(self._last_bar, current)
+        )
+
+    def update(self, matrix):
+        """Incorpora las barras de `matrix` que aún no se han procesado."""
+        if matrix.tickers != self.tickers:
+            raise ValueError("La matriz no corresponde a los tickers del conjunto de indicadores.")
+        with self._lock:
+            if self.dates is not None and not self._last_bar_unchanged(matrix):
+                self._reset()
+            new = slice(None) if self.dates is None else matrix.dates > self.dates[-1]
+            dates = matrix.dates[new]
+            if len(dates) == 0:
+                return 0
+            close = matrix.close[new]
+            high = None if matrix.high is None else matrix.high[new]
+            low = None if matrix.low is None else matrix.low[new]
+            for indicator in self.indicators:
+                if isinstance(indicator, ATR) and high is None:
+                    continue
+                for name, values in indicator.update(close, high, low).items():
+                    self._values.setdefault(name, _GrowingArray(len(self.tickers))).append(values)
+            self.dates = dates if self.dates is None else self.dates.append(dates)
+            self._last_bar = [None if prices is None else prices[-1].copy() for prices in (close, high, low)]
+            return len(dates)
+
+    @property
+    def fingerprint(self):
+        """Huella del estado: entre reconstrucciones solo se anexan barras, así que basta con la última fecha."""
+        last = None if self.dates is None else self.dates[-1]
+        return f"{self.tickers}|{self._generation}|{0 if self.dates is None else len(self.dates)}|{last}"
+
+    @property
+    def names(self):
+        return list(self._values)
+
+    def series(self, name, ticker):
+        """Serie del indicador `name` para un ticker, indexada por fecha."""
+        values = self._values[name].values[:, self.tickers.index(ticker)]
+        return pd.Series(values, index=self.dates, name=name)
@@ -0,0 +1,174 @@
+"""Instrumentación ligera: tiempos, llamadas, aciertos de caché y bytes descargados.
+
+Se activa con la variable de entorno `ETF_PROFILE=1` o con `enable()`.
+Desactivada, cada función decorada solo comprueba una bandera antes de
+ejecutarse, así que puede dejarse puesta en producción.
+
+    @timed
+    def calculate_metrics(df): ...
+
+    with stage("render"):
+        ...
+
+Las estadísticas son del proceso (compartidas por todas las sesiones de
+Streamlit) y se exportan con `report`, `to_json` y `to_csv`.
+"""
+import csv
+import functools
+import io
+import json
+import os
+import threading
+from time import perf_counter
+
+_enabled = os.environ.get("ETF_PROFILE", "") not in ("", "0")
+_stats = {}
+_caches = {}
+# Funciones decoradas con `timed(cached=True)`; se marcan al importar, así que `reset` no las borra
+_cached = set()
+_lock = threading.Lock()
+
+# Columnas del reporte, en el orden en que se exportan
+REPORT_FIELDS = ("name", "calls", "total_ms", "mean_ms", "max_ms", "hits", "misses", "bytes")
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Borra las estadísticas acumuladas (las cachés registradas y las funciones en caché se conservan)."""
+    with _lock:
+        _stats.clear()
+
+
+def _entry(name):
+    entry = _stats.get(name)
+    if entry is None:
+        entry = _stats[name] = {"calls": 0, "total": 0.0, "max": 0.0, "hits": 0, "misses": 0, "bytes": 0}
+    return entry
+
+
+def record_time(name, seconds):
+    with _lock:
+        entry = _entry(name)
+        entry["calls"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+
+
+def record_miss(name):
+    """Anota que una función en caché tuvo que calcular su resultado.
+
+    Se llama desde el cuerpo de las funciones de `st.cache_data`, que solo se
+    ejecuta en los fallos; los aciertos son el resto de llamadas.
+    """
+    if _enabled:
+        with _lock:
+            _entry(name)["misses"] += 1
+
+
+def record_bytes(name, nbytes):
+    if _enabled:
+        with _lock:
+            _entry(name)["bytes"] += int(nbytes)
+
+
+def register_cache(name, cache):
+    """Incluye en el reporte los contadores `hits`/`misses` de una caché (como `LRUCache`)."""
+    _caches[name] = cache
+
+
+def timed(func=None, *, name=None, cached=False):
+    """Decorador que mide el tiempo de pared y las llamadas de una función.
+
+    Con `cached=True` el reporte deduce los aciertos de caché como las
+    llamadas que no registraron un `record_miss`. Se usa por fuera de los
+    decoradores de caché de Streamlit para contar también los aciertos.
+    """
+    def decorator(func):
+        label = name or func.__name__
+        if cached:
+            with _lock:
+                _cached.add(label)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_time(label, perf_counter() - start)
+        return wrapper
+
+    return decorator if func is None else decorator(func)
+
+
+class stage:
+    """Context manager que mide una etapa dentro de una función."""
+
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        if _enabled:
+            self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            record_time(self.name, perf_counter() - self._start)
+        return False
+
+
+def report():
+    """Estadísticas acumuladas como lista de diccionarios, de mayor a menor tiempo total."""
+    rows = []
+    with _lock:
+        for name, entry in _stats.items():
+            if not entry["calls"] and not entry["misses"] and not entry["bytes"]:
+                continue
+            hits = max(entry["calls"] - entry["misses"], 0) if name in _cached else entry["hits"]
+            rows.append({
+                "name": name,
+                "calls": entry["calls"],
+                "total_ms": entry["total"] * 1000,
+                "mean_ms": entry["total"] * 1000 / entry["calls"] if entry["calls"] else 0.0,
+                "max_ms": entry["max"] * 1000,
+                "hits": hits,
+                "misses": entry["misses"],
+                "bytes": entry["bytes"],
+            })
+    for name, cache in _caches.items():
+        rows.append({
+            "name": name, "calls": cache.hits + cache.misses, "total_ms": 0.0, "mean_ms": 0.0,
+            "max_ms": 0.0, "hits": cache.hits, "misses": cache.misses, "bytes": 0,
+        })
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def to_json(rows=None):
+    return json.dumps(report() if rows is None else rows, indent=2)
+
+
+def to_csv(rows=None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(report() if rows is None else rows)
+    return buffer.getvalue()
@@ -0,0 +1,234 @@
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from price_store import PRICE_COLUMNS
+
+# Directorio compartido por todos los procesos de la aplicación en la misma máquina
+MARKET_CACHE_DIR = "market_cache"
+
+# Archivo con el nombre de la versión vigente; se reemplaza de forma atómica al publicar
+CURRENT_FILE = "CURRENT"
+
+# Versiones anteriores que se conservan para los lectores que aún las tienen abiertas
+KEEP_VERSIONS = 2
+
+# Cada cuánto un lector comprueba si hay una versión nueva (segundos)
+CHECK_INTERVAL = 5.0
+
+
+class FileLock:
+    """Candado entre procesos basado en la creación exclusiva de un archivo.
+
+    Funciona igual en Windows y en Linux. Un candado más antiguo que
+    `stale_after` segundos se considera abandonado (el proceso que lo tenía
+    terminó sin liberarlo) y se reemplaza.
+    """
+
+    def __init__(self, path, stale_after=3600):
+        self.path = path
+        self.stale_after = stale_after
+        self._held = False
+
+    def acquire(self):
+        """Intenta tomar el candado sin esperar; devuelve False si otro proceso lo tiene."""
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) < self.stale_after:
+                        return False
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{os.getpid()} {datetime.now().isoformat()}")
+            self._held = True
+            return True
+        return False
+
+    def release(self):
+        if self._held:
+            self._held = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class MarketSnapshot:
+    """Una versión publicada de la caché, abierta en modo de solo lectura con `mmap`.
+
+    Las barras de todos los tickers están concatenadas por ticker (como
+    una matriz dispersa CSR): las de un ticker ocupan un tramo contiguo de
+    `values`, así que `read` devuelve vistas del archivo sin copiarlo. El
+    sistema operativo comparte esas páginas entre todos los procesos.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        self.version = os.path.basename(path)
+        self.published_at = datetime.fromisoformat(index["published_at"])
+        # Hasta cuándo la considera vigente quien la publicó (None en versiones sin horario)
+        self.valid_until = datetime.fromisoformat(index["valid_until"]) if index.get("valid_until") else None
+        self.columns = index["columns"]
+        self.tickers = index["tickers"]
+        self._offsets = dict(zip(self.tickers, zip(index["offsets"][:-1], index["offsets"][1:])))
+        self.dates = np.load(os.path.join(path, "dates.npy"), mmap_mode="r")
+        self.values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+
+    def __contains__(self, ticker):
+        return ticker in self._offsets
+
+    def read(self, ticker, start=None, end=None):
+        """Barras de un ticker en el rango [start, end), como `PriceStore.read` (vacío si no está publicado)."""
+        if ticker not in self._offsets:
+            return pd.DataFrame()
+        first, last = self._offsets[ticker]
+        dates = self.dates[first:last]
+        if start is not None:
+            first += int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns")))
+        if end is not None:
+            last = self._offsets[ticker][0] + int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns")))
+        if first >= last:
+            return pd.DataFrame()
+        index = pd.DatetimeIndex(self.dates[first:last], name="Date")
+        return pd.DataFrame(self.values[first:last], index=index, columns=self.columns, copy=False)
+
+
+def publish_snapshot(frames, directory=MARKET_CACHE_DIR, published_at=None, valid_until=None):
+    """Escribe `frames` ({ticker: DataFrame}) como una versión nueva y la vuelve vigente.
+
+    `valid_until` es el momento a partir del cual los lectores deben
+    considerarla vencida (la siguiente actualización programada más un
+    margen); se guarda en `index.json` junto con `published_at`.
+
+    La versión se escribe completa en su propio subdirectorio y después se
+    reemplaza `CURRENT` con `os.replace`, que es atómico: los lectores ven
+    la versión anterior o la nueva, nunca una a medias. Devuelve el nombre
+    de la versión publicada.
+    """
+    os.makedirs(directory, exist_ok=True)
+    published_at = published_at or datetime.now().astimezone()
+    version = f"v{published_at:%Y%m%d%H%M%S}-{os.getpid()}"
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+
+    columns = list(PRICE_COLUMNS)
+    tickers, offsets, dates, values = [], [0], [], []
+    for ticker, df in frames.items():
+        if df is None or df.empty or "Close" not in df.columns:
+            continue
+        df = df.sort_index()
+        tickers.append(ticker)
+        offsets.append(offsets[-1] + len(df))
+        dates.append(df.index.to_numpy(dtype="datetime64[ns]"))
+        values.append(df.reindex(columns=columns).to_numpy(dtype="float64"))
+    np.save(os.path.join(path, "dates.npy"), np.concatenate(dates) if dates else np.empty(0, "datetime64[ns]"))
+    np.save(os.path.join(path, "values.npy"), np.vstack(values) if values else np.empty((0, len(columns))))
+    with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "published_at": published_at.isoformat(),
+            "valid_until": valid_until.isoformat() if valid_until else None, "columns": columns,
+            "tickers": tickers, "offsets": offsets,
+        }, f)
+
+    pointer = os.path.join(directory, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+    _remove_old_versions(directory, version)
+    return version
+
+
+def _remove_old_versions(directory, current):
+    versions = sorted(name for name in os.listdir(directory) if name.startswith("v") and name != current)
+    for name in versions[:max(len(versions) - (KEEP_VERSIONS - 1), 0)]:
+        # En Windows no se pueden borrar archivos que otro proceso tiene mapeados; se reintenta en la próxima publicación
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+class SharedMarketCache:
+    """Acceso a la versión vigente de la caché compartida desde cualquier proceso.
+
+    `snapshot` devuelve la última versión publicada (o None si aún no hay
+    ninguna) y solo vuelve a leer `CURRENT` cada `check_interval` segundos.
+    """
+
+    def __init__(self, directory=MARKET_CACHE_DIR, check_interval=CHECK_INTERVAL):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def lock(self, stale_after=3600):
+        """Candado entre procesos para que una sola actualización publique a la vez."""
+        os.makedirs(self.directory, exist_ok=True)
+        return FileLock(os.path.join(self.directory, "refresh.lock"), stale_after)
+
+    def snapshot(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if now - self._checked_at >= self.check_interval:
+                self._snapshot = self._load_current()
+                self._checked_at = now
+            return self._snapshot
+
+    def _load_current(self):
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE), encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if self._snapshot is not None and self._snapshot.version == version:
+            return self._snapshot
+        try:
+            return MarketSnapshot(os.path.join(self.directory, version))
+        except (OSError, ValueError):
+            # Versión borrada o incompleta: se conserva la que ya estaba abierta
+            return self._snapshot
+
+    def publish(self, frames, published_at=None, valid_until=None):
+        version = publish_snapshot(frames, self.directory, published_at, valid_until)
+        self._checked_at = 0.0
+        return version
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_market_cache():
+    """Caché compartida del proceso (en `MARKET_CACHE_DIR`)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SharedMarketCache()
+        return _default_cache
+
+
+def set_market_cache(cache):
+    """Reemplaza la caché del proceso (por ejemplo, para pruebas o benchmarks)."""
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
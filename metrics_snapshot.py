@@ -0,0 +1,100 @@
+"""Calcula y guarda instantáneas diarias de métricas por ETF y período.
+
+Uso: python metrics_snapshot.py [--tickers SPY QQQ] [--periods 1y 5y]
+
+Las métricas se guardan en la tabla `etf_performance` (una fila por
+ticker, período y fecha) para que la aplicación pueda mostrarlas sin
+descargar precios ni recalcularlas en cada visita.
+"""
+import argparse
+from datetime import date, timedelta
+
+from database import get_connection
+from etf_catalog import PERIOD_MAPPING, etf_descriptions
+from price_matrix import PriceMatrix, matrix_metrics
+from price_store import get_price_store, period_start
+
+# Antigüedad máxima de una instantánea para darla por válida (cubre fines de semana)
+SNAPSHOT_MAX_AGE = timedelta(days=3)
+
+
+def compute_snapshots(tickers, periods, today=None):
+    """Calcula las métricas de todos los tickers para cada período.
+
+    Cada histórico se lee una sola vez del almacén local y se recorta en
+    memoria para cada período. Devuelve `(snapshots, errors)`, con
+    `snapshots[period][ticker]` en el formato de `calculate_metrics`.
+    """
+    store = get_price_store()
+    errors = store.update_many(tickers)
+    history = {ticker: store.read(ticker) for ticker in tickers if ticker not in errors}
+    history = {ticker: df for ticker, df in history.items() if not df.empty}
+    snapshots = {}
+    for period in periods:
+        start = period_start(period, today)
+        frames = {ticker: df if start is None else df[df.index >= start] for ticker, df in history.items()}
+        snapshots[period] = matrix_metrics(PriceMatrix.from_frames(frames, list(tickers)))
+    return snapshots, errors
+
+
+def save_snapshots(snapshots, snapshot_date):
+    """Inserta o reemplaza las métricas de `snapshot_date` en una sola transacción."""
+    rows = [
+        (ticker, period, snapshot_date.isoformat(),
+         values["Average Return"], values["Volatility"], values["Cumulative Return"])
+        for period, metrics in snapshots.items()
+        for ticker, values in metrics.items()
+        if values["Average Return"] is not None
+    ]
+    with get_connection() as conn, conn:
+        conn.executemany("""
+            INSERT INTO etf_performance
+                (ticker, period, snapshot_date, average_return, volatility, cumulative_return)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (period, snapshot_date, ticker) DO UPDATE SET
+                average_return = excluded.average_return,
+                volatility = excluded.volatility,
+                cumulative_return = excluded.cumulative_return,
+                date_added = CURRENT_TIMESTAMP
+        """, rows)
+    return len(rows)
+
+
+def load_snapshot(period, max_age=SNAPSHOT_MAX_AGE, today=None):
+    """Devuelve `(fecha, métricas por ticker)` de la instantánea más reciente, o None si no hay una vigente."""
+    today = today or date.today()
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT ticker, average_return, volatility, cumulative_return, snapshot_date
+            FROM etf_performance
+            WHERE period = ? AND snapshot_date = (
+                SELECT MAX(snapshot_date) FROM etf_performance WHERE period = ?
+            )
+        """, (period, period)).fetchall()
+    if not rows:
+        return None
+    snapshot_date = date.fromisoformat(rows[0][4])
+    if today - snapshot_date > max_age:
+        return None
+    return snapshot_date, {
+        ticker: {"Average Return": avg_return, "Volatility": volatility, "Cumulative Return": cumulative}
+        for ticker, avg_return, volatility, cumulative, _ in rows
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", nargs="+", default=list(etf_descriptions), help="Tickers a procesar (por defecto, todos)")
+    parser.add_argument("--periods", nargs="+", default=list(PERIOD_MAPPING.values()), help="Períodos de Yahoo Finance (1y, 5y, ytd...)")
+    args = parser.parse_args()
+
+    today = date.today()
+    snapshots, errors = compute_snapshots(args.tickers, args.periods, today)
+    saved = save_snapshots(snapshots, today)
+    print(f"Instantánea del {today}: {saved} filas guardadas para {len(args.periods)} períodos.")
+    for ticker, error in errors.items():
+        print(f"  Error al actualizar {ticker}: {error}")
+
+
+if __name__ == "__main__":
+    main()
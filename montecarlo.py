@@ -0,0 +1,82 @@
+import numpy as np
+
+from portfolio import TRADING_DAYS
+
+# Percentiles que se reportan por defecto (bandas P5/P50/P95)
+PERCENTILES = (5, 50, 95)
+
+# Trayectorias generadas por bloque para acotar la memoria
+CHUNK_SIZE = 10_000
+
+
+def step_log_returns(daily_returns, steps_per_year=12, periods_per_year=TRADING_DAYS):
+    """Agrupa rendimientos diarios en bloques consecutivos y devuelve su rendimiento logarítmico.
+
+    Con `steps_per_year=12` cada bloque son ~21 días hábiles, de modo que el
+    muestreo conserva la autocorrelación y las colas dentro de cada mes.
+    """
+    daily = np.asarray(daily_returns, dtype="float64")
+    daily = daily[~np.isnan(daily)]
+    block = max(periods_per_year // steps_per_year, 1)
+    n_blocks = len(daily) // block
+    if n_blocks == 0:
+        raise ValueError("No hay suficientes rendimientos históricos para simular.")
+    # Se usan los bloques más recientes
+    log_daily = np.log1p(daily[len(daily) - n_blocks * block:])
+    return log_daily.reshape(n_blocks, block).sum(axis=1)
+
+
+def simulate_monte_carlo(initial_amount, periodic_contribution, daily_returns, years,
+                         n_paths=10_000, method="bootstrap", steps_per_year=12,
+                         contributions_per_year=1, percentiles=PERCENTILES, seed=None,
+                         chunk_size=CHUNK_SIZE):
+    """Simula `n_paths` trayectorias de una inversión con aportaciones periódicas.
+
+    `method="bootstrap"` remuestrea con reemplazo los rendimientos
+    históricos por bloques; `method="normal"` usa un modelo lognormal con la
+    media y la desviación de esos bloques. Cada año tiene `steps_per_year`
+    pasos y la aportación se suma al final de cada uno de los
+    `contributions_per_year` subperíodos, como en `simulate_long_term_growth`.
+
+    Las trayectorias se generan en bloques de `chunk_size` con un único
+    generador sembrado con `seed`, así que el resultado es reproducible para
+    una misma combinación de parámetros. Devuelve un diccionario con el
+    valor de cada percentil al cierre de cada año (índice 0 = hoy) y la
+    media del monto final.
+    """
+    if method not in ("bootstrap", "normal"):
+        raise ValueError(f"Método de simulación no soportado: {method}")
+    if steps_per_year % contributions_per_year:
+        raise ValueError("steps_per_year debe ser múltiplo de contributions_per_year.")
+
+    history = step_log_returns(daily_returns, steps_per_year)
+    mean = history.mean()
+    std = history.std(ddof=1) if len(history) > 1 else 0.0
+    rng = np.random.default_rng(seed)
+
+    # Solo importa el crecimiento entre aportaciones: los pasos se suman por subperíodo
+    steps_per_period = steps_per_year // contributions_per_year
+    n_periods = years * contributions_per_year
+    year_ends = np.arange(1, years + 1) * contributions_per_year - 1
+
+    yearly = np.empty((n_paths, years + 1))
+    yearly[:, 0] = initial_amount
+    for start in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - start)
+        if method == "bootstrap":
+            samples = history[rng.integers(0, len(history), size=(size, n_periods * steps_per_period))]
+            log_returns = samples.reshape(size, n_periods, steps_per_period).sum(axis=2)
+        else:
+            # La suma de pasos normales independientes también es normal
+            log_returns = rng.normal(mean * steps_per_period, std * np.sqrt(steps_per_period), size=(size, n_periods))
+        # W_k = G_k * (W_0 + Σ_{j<=k} c / G_j), con G_k el crecimiento acumulado hasta el subperíodo k
+        log_growth = np.cumsum(log_returns, axis=1)
+        discounted = np.cumsum(periodic_contribution * np.exp(-log_growth), axis=1)
+        yearly[start:start + size, 1:] = np.exp(log_growth[:, year_ends]) * (initial_amount + discounted[:, year_ends])
+
+    bands = np.percentile(yearly, percentiles, axis=0)
+    return {
+        'Years': np.arange(years + 1),
+        'Percentiles': dict(zip(percentiles, bands)),
+        'Mean Final': float(yearly[:, -1].mean()),
+    }
@@ -0,0 +1,160 @@
+import numpy as np
+
+from portfolio import TRADING_DAYS
+
+# Todas las carteras son solo largas y totalmente invertidas: 0 <= w_i <= 1, Σw = 1
+
+# Puntos de la frontera eficiente que se muestrean por defecto
+FRONTIER_POINTS = 25
+
+# Cota inferior de los pesos en la paridad de riesgo (el logaritmo exige y > 0)
+_TOLERANCE = 1e-10
+
+
+def annualized_inputs(returns, covariance=None, periods_per_year=TRADING_DAYS):
+    """Rendimientos esperados y covarianza anualizados a partir de rendimientos diarios.
+
+    `returns` es una matriz fechas x tickers (como `PriceMatrix.returns`);
+    solo se usan las fechas en que todos los tickers tienen rendimiento. Si
+    se pasa `covariance` (diaria, por ejemplo de `CovarianceEngine`), se usa
+    en lugar de la covarianza muestral de esas fechas.
+    """
+    returns = np.asarray(returns, dtype="float64")
+    returns = returns[~np.isnan(returns).any(axis=1)]
+    if len(returns) < 2:
+        raise ValueError("No hay suficientes rendimientos comunes para optimizar la cartera.")
+    if covariance is None:
+        covariance = np.atleast_2d(np.cov(returns, rowvar=False))
+    return returns.mean(axis=0) * periods_per_year, np.asarray(covariance, dtype="float64") * periods_per_year
+
+
+def _solve_quadratic(covariance, constraints, start):
+    """Minimiza w'Σw con restricciones adicionales y pesos entre 0 y 1."""
+    from scipy.optimize import minimize
+    n = len(covariance)
+    result = minimize(
+        lambda w: w @ covariance @ w, start, jac=lambda w: 2 * covariance @ w,
+        method="SLSQP", bounds=[(0.0, 1.0)] * n, constraints=constraints,
+        options={"ftol": 1e-12, "maxiter": 200},
+    )
+    weights = np.clip(result.x, 0.0, None)
+    return weights / weights.sum()
+
+
+def _budget(n):
+    return {"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones(n)}
+
+
+def min_variance(covariance):
+    """Cartera de mínima varianza."""
+    covariance = np.asarray(covariance, dtype="float64")
+    n = len(covariance)
+    return _solve_quadratic(covariance, [_budget(n)], np.full(n, 1 / n))
+
+
+def max_sharpe(mean_returns, covariance, risk_free=0.0):
+    """Cartera tangente (máximo Sharpe).
+
+    Se resuelve como el problema cuadrático convexo min y'Σy con
+    (μ - rf)'y = 1, y >= 0, y w = y / Σy. Si ningún activo supera la tasa
+    libre de riesgo no hay cartera tangente y se devuelve la de mínima varianza.
+    """
+    from scipy.optimize import minimize
+    covariance = np.asarray(covariance, dtype="float64")
+    excess = np.asarray(mean_returns, dtype="float64") - risk_free
+    if (excess <= 0).all():
+        return min_variance(covariance)
+    n = len(covariance)
+    start = np.where(excess > 0, excess, 0.0) / np.square(excess[excess > 0]).sum()
+    result = minimize(
+        lambda y: y @ covariance @ y, start, jac=lambda y: 2 * covariance @ y,
+        method="SLSQP", bounds=[(0.0, None)] * n,
+        constraints=[{"type": "eq", "fun": lambda y: excess @ y - 1, "jac": lambda y: excess}],
+        options={"ftol": 1e-14, "maxiter": 200},
+    )
+    weights = np.clip(result.x, 0.0, None)
+    return weights / weights.sum()
+
+
+def risk_parity(covariance, budget=None):
+    """Cartera de paridad de riesgo: cada activo aporta `budget` de la varianza (por defecto, lo mismo).
+
+    Usa la formulación convexa de Spinu: min ½ y'Σy - b'log(y), con w = y / Σy.
+    """
+    from scipy.optimize import minimize
+    covariance = np.asarray(covariance, dtype="float64")
+    n = len(covariance)
+    budget = np.full(n, 1 / n) if budget is None else np.asarray(budget, dtype="float64") / np.sum(budget)
+    start = budget / np.sqrt(np.diag(covariance))
+    result = minimize(
+        lambda y: 0.5 * y @ covariance @ y - budget @ np.log(y), start,
+        jac=lambda y: covariance @ y - budget / y,
+        method="L-BFGS-B", bounds=[(_TOLERANCE, None)] * n,
+        options={"ftol": 1e-15, "gtol": 1e-12},
+    )
+    return result.x / result.x.sum()
+
+
+def efficient_frontier(mean_returns, covariance, n_points=FRONTIER_POINTS):
+    """Muestra la frontera eficiente entre la cartera de mínima varianza y el activo de mayor rendimiento.
+
+    Devuelve un diccionario con los rendimientos, volatilidades y pesos
+    (`n_points` x activos) de cada punto. Cada punto parte de la solución
+    del anterior, así que los problemas convergen en pocas iteraciones.
+    """
+    mean_returns = np.asarray(mean_returns, dtype="float64")
+    covariance = np.asarray(covariance, dtype="float64")
+    n = len(covariance)
+    weights = min_variance(covariance)
+    targets = np.linspace(weights @ mean_returns, mean_returns.max(), n_points)
+    frontier = np.empty((n_points, n))
+    for i, target in enumerate(targets):
+        constraints = [
+            _budget(n),
+            {"type": "eq", "fun": lambda w, target=target: w @ mean_returns - target, "jac": lambda w: mean_returns},
+        ]
+        weights = weights if i == 0 else _solve_quadratic(covariance, constraints, weights)
+        frontier[i] = weights
+    variances = np.einsum("ki,ij,kj->k", frontier, covariance, frontier)
+    return {
+        'Returns': frontier @ mean_returns,
+        'Volatility': np.sqrt(np.maximum(variances, 0.0)),
+        'Weights': frontier,
+    }
+
+
+def optimal_portfolios(mean_returns, covariance, risk_free=0.0, n_points=FRONTIER_POINTS):
+    """Carteras de mínima varianza, máximo Sharpe y paridad de riesgo, más la frontera eficiente.
+
+    Las entradas deben estar anualizadas (ver `annualized_inputs`). Para
+    cada cartera se devuelven sus pesos, rendimiento, volatilidad y Sharpe.
+    """
+    mean_returns = np.asarray(mean_returns, dtype="float64")
+    covariance = np.asarray(covariance, dtype="float64")
+
+    def describe(weights):
+        volatility = float(np.sqrt(max(weights @ covariance @ weights, 0.0)))
+        annual_return = float(weights @ mean_returns)
+        return {
+            'Weights': weights,
+            'Annual Return': annual_return,
+            'Annual Volatility': volatility,
+            'Sharpe Ratio': (annual_return - risk_free) / volatility if volatility > 0 else None,
+        }
+
+    return {
+        'Min Variance': describe(min_variance(covariance)),
+        'Max Sharpe': describe(max_sharpe(mean_returns, covariance, risk_free)),
+        'Risk Parity': describe(risk_parity(covariance)),
+        'Frontier': efficient_frontier(mean_returns, covariance, n_points),
+    }
+
+
+def to_percentages(weights):
+    """Redondea pesos a porcentajes enteros que suman exactamente 100 (método del mayor residuo)."""
+    raw = np.asarray(weights, dtype="float64") * 100
+    percentages = np.floor(raw).astype(int)
+    missing = 100 - percentages.sum()
+    for i in np.argsort(percentages - raw)[:missing]:
+        percentages[i] += 1
+    return percentages.tolist()
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Días hábiles por año usados para anualizar
+TRADING_DAYS = 252
+
+
+def normalize_weights(weights):
+    """Convierte asignaciones (por ejemplo, porcentajes de los sliders) en pesos que suman 1."""
+    weights = np.asarray(weights, dtype="float64")
+    total = weights.sum()
+    if total <= 0:
+        raise ValueError("La suma de las asignaciones debe ser mayor que cero.")
+    return weights / total
+
+
+def portfolio_metrics(weights, returns, risk_free=0.0, periods_per_year=TRADING_DAYS):
+    """Calcula las métricas de una cartera sobre una matriz de rendimientos.
+
+    `weights` tiene un elemento por columna de `returns` (matriz fechas x
+    tickers, como `PriceMatrix.returns`) y se normaliza para sumar 1. Solo
+    se usan las fechas en que todos los activos con peso tienen
+    rendimiento. La contribución al riesgo de cada activo es su fracción de
+    la varianza de la cartera, w_i * (Σw)_i / (w'Σw).
+    """
+    weights = normalize_weights(weights)
+    returns = np.asarray(returns, dtype="float64")
+    held = weights > 0
+    rows = ~np.isnan(returns[:, held]).any(axis=1)
+    asset_returns = np.nan_to_num(returns[rows])
+
+    empty = {
+        'Annual Return': None, 'Annual Volatility': None, 'Sharpe Ratio': None,
+        'Sortino Ratio': None, 'Max Drawdown': None,
+        'Risk Contribution': np.zeros_like(weights), 'Returns': np.empty(0),
+        'Drawdown': np.empty(0), 'Rows': rows,
+    }
+    if len(asset_returns) < 2:
+        return empty
+
+    portfolio_returns = asset_returns @ weights
+    wealth = np.cumprod(1 + portfolio_returns)
+    drawdown = wealth / np.maximum.accumulate(wealth) - 1
+
+    n = len(portfolio_returns)
+    annual_return = wealth[-1] ** (periods_per_year / n) - 1
+    annual_volatility = portfolio_returns.std(ddof=1) * np.sqrt(periods_per_year)
+    period_risk_free = (1 + risk_free) ** (1 / periods_per_year) - 1
+    downside = np.minimum(portfolio_returns - period_risk_free, 0)
+    downside_deviation = np.sqrt(np.mean(downside ** 2) * periods_per_year)
+
+    held_weights = weights[held]
+    covariance = np.atleast_2d(np.cov(asset_returns[:, held], rowvar=False))
+    marginal = covariance @ held_weights
+    variance = held_weights @ marginal
+    risk_contribution = np.zeros_like(weights)
+    if variance > 0:
+        risk_contribution[held] = held_weights * marginal / variance
+
+    excess = annual_return - risk_free
+    return {
+        'Annual Return': float(annual_return),
+        'Annual Volatility': float(annual_volatility),
+        'Sharpe Ratio': float(excess / annual_volatility) if annual_volatility > 0 else None,
+        'Sortino Ratio': float(excess / downside_deviation) if downside_deviation > 0 else None,
+        'Max Drawdown': float(drawdown.min()),
+        'Risk Contribution': risk_contribution,
+        'Returns': portfolio_returns,
+        'Drawdown': drawdown,
+        'Rows': rows,
+    }
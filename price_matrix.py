@@ -0,0 +1,169 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Máximo de días consecutivos sin cotización que se rellenan con el último cierre
+FILL_LIMIT = 5
+
+
+def _fill_short_gaps(values, limit):
+    """Rellena con el último valor los huecos de hasta `limit` filas; los más largos quedan completos en NaN."""
+    missing = np.isnan(values)
+    filled = pd.DataFrame(values).ffill(limit=limit).to_numpy(copy=True)
+    for i in range(values.shape[1]):
+        column = missing[:, i]
+        # Cada hueco comparte grupo con la última fila con valor que lo precede
+        groups = np.cumsum(~column)
+        lengths = np.bincount(groups, weights=column)[groups]
+        filled[column & (lengths > limit), i] = np.nan
+    return filled
+
+
+class PriceMatrix:
+    """Precios de cierre de varios tickers alineados sobre un mismo calendario.
+
+    `close` y `returns` son matrices float64 de solo lectura con una fila por
+    fecha (unión de los calendarios de todos los tickers) y una columna por
+    ticker. Política de faltantes: antes de la primera cotización de un
+    ticker el valor es NaN; los huecos posteriores de hasta `fill_limit`
+    días se rellenan con el último cierre (rendimiento 0) y los más largos
+    quedan como NaN. El rendimiento de una fecha es NaN si falta el cierre
+    de esa fecha o el de la anterior. `high` y `low` son opcionales y siguen
+    la misma política.
+    """
+
+    def __init__(self, dates, tickers, close, high=None, low=None):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.close = np.asarray(close, dtype="float64")
+        self.high = None if high is None else np.asarray(high, dtype="float64")
+        self.low = None if low is None else np.asarray(low, dtype="float64")
+        self.returns = np.full_like(self.close, np.nan)
+        if len(self.close) > 1:
+            self.returns[1:] = self.close[1:] / self.close[:-1] - 1
+        for values in (self.close, self.high, self.low, self.returns):
+            if values is not None:
+                values.flags.writeable = False
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._fingerprint = None
+
+    @classmethod
+    def from_frames(cls, data, tickers, fill_limit=FILL_LIMIT):
+        """Construye la matriz a partir del diccionario que devuelve `get_etf_data`."""
+        frames = {
+            ticker: data[ticker]
+            for ticker in tickers
+            if ticker in data and not data[ticker].empty and "Close" in data[ticker].columns
+        }
+        if not frames:
+            return cls(pd.DatetimeIndex([]), tickers, np.empty((0, len(tickers))))
+        dates = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))))
+        positions = {ticker: dates.get_indexer(df.index) for ticker, df in frames.items()}
+
+        def align(column):
+            values = np.full((len(dates), len(tickers)), np.nan)
+            for i, ticker in enumerate(tickers):
+                if ticker in frames:
+                    values[positions[ticker], i] = frames[ticker][column].to_numpy(dtype="float64")
+            if fill_limit:
+                values = _fill_short_gaps(values, fill_limit)
+                # El relleno no debe extenderse más allá de la última cotización real
+                for i, ticker in enumerate(tickers):
+                    if ticker in frames:
+                        values[dates > frames[ticker].index.max(), i] = np.nan
+            return values
+
+        has_range = all("High" in df.columns and "Low" in df.columns for df in frames.values())
+        if has_range:
+            return cls(dates, tickers, align("Close"), align("High"), align("Low"))
+        return cls(dates, tickers, align("Close"))
+
+    def __contains__(self, ticker):
+        return ticker in self._positions
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def empty(self):
+        return len(self.dates) == 0 or np.isnan(self.close).all()
+
+    @property
+    def valid_tickers(self):
+        """Tickers con al menos un cierre disponible."""
+        has_data = ~np.isnan(self.close).all(axis=0) if len(self.dates) else np.zeros(len(self.tickers), bool)
+        return [ticker for ticker, ok in zip(self.tickers, has_data) if ok]
+
+    @property
+    def fingerprint(self):
+        """Huella de fechas, tickers y precios; se calcula una sola vez porque la matriz es inmutable."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr(self.tickers).encode())
+            digest.update(self.dates.asi8.tobytes())
+            for values in (self.close, self.high, self.low):
+                if values is not None:
+                    digest.update(np.ascontiguousarray(values).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def position(self, ticker):
+        return self._positions[ticker]
+
+    def close_series(self, ticker):
+        """Serie de cierres de un ticker sin las fechas previas a su primera cotización."""
+        s = pd.Series(self.close[:, self._positions[ticker]], index=self.dates, name=ticker)
+        return s.loc[s.first_valid_index():] if s.notna().any() else s.iloc[:0]
+
+    def returns_series(self, ticker):
+        return pd.Series(self.returns[:, self._positions[ticker]], index=self.dates, name=ticker).dropna()
+
+    def close_frame(self):
+        """Vista en DataFrame de la matriz de cierres (sin copiar los datos)."""
+        return pd.DataFrame(self.close, index=self.dates, columns=self.tickers, copy=False)
+
+    def returns_frame(self):
+        return pd.DataFrame(self.returns, index=self.dates, columns=self.tickers, copy=False)
+
+    def select(self, tickers):
+        """Submatriz con los tickers indicados, en ese orden."""
+        columns = [self._positions[ticker] for ticker in tickers]
+        high = None if self.high is None else self.high[:, columns]
+        low = None if self.low is None else self.low[:, columns]
+        return PriceMatrix(self.dates, tickers, self.close[:, columns], high, low)
+
+    def correlation(self):
+        """Correlación de Pearson de los rendimientos (observaciones por pares)."""
+        return self.returns_frame().corr()
+
+
+def matrix_metrics(matrix):
+    """Calcula las métricas de `calculate_metrics` para todos los tickers de la matriz a la vez."""
+    empty = {"Average Return": None, "Volatility": None, "Cumulative Return": None}
+    if matrix.empty:
+        return {ticker: dict(empty) for ticker in matrix.tickers}
+
+    valid = ~np.isnan(matrix.returns)
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_returns = np.nansum(matrix.returns, axis=0) / counts
+        volatilities = np.sqrt(np.nansum((matrix.returns - avg_returns) ** 2, axis=0) / counts)
+        # Primer y último cierre disponibles de cada columna
+        has_close = ~np.isnan(matrix.close)
+        first = has_close.argmax(axis=0)
+        last = len(matrix) - 1 - has_close[::-1].argmax(axis=0)
+        columns = np.arange(len(matrix.tickers))
+        cumulative = matrix.close[last, columns] / matrix.close[first, columns] - 1
+
+    metrics = {}
+    for i, ticker in enumerate(matrix.tickers):
+        if counts[i] == 0:
+            metrics[ticker] = dict(empty)
+        else:
+            metrics[ticker] = {
+                "Average Return": float(avg_returns[i]),
+                "Volatility": float(volatilities[i]),
+                "Cumulative Return": float(cumulative[i]),
+            }
+    return metrics
@@ -0,0 +1,401 @@
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from instrumentation import is_enabled, record_bytes, timed
+
+# Base de datos local con el histórico diario completo de cada ticker
+PRICE_DB_PATH = "market_data.db"
+
+# Columnas OHLCV tal como las entrega Yahoo Finance y su nombre en la tabla
+PRICE_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "Dividends": "dividends",
+    "Stock Splits": "stock_splits",
+}
+
+# Tiempo mínimo entre dos consultas al proveedor para un mismo ticker
+REFRESH_INTERVAL = timedelta(hours=6)
+
+# Parámetros de la descarga concurrente cuando el proveedor no admite lotes
+MAX_WORKERS = 8
+FETCH_TIMEOUT = 30
+FETCH_RETRIES = 2
+RETRY_BACKOFF = 1.0
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+class PriceProvider:
+    """Interfaz de un proveedor de precios OHLCV diarios.
+
+    `history` devuelve un DataFrame indexado por fecha con las columnas de
+    `PRICE_COLUMNS` (o un DataFrame vacío si no hay datos). Los proveedores
+    con `supports_batch` implementan además `history_many`, que resuelve
+    varios tickers en una sola petición y devuelve un diccionario.
+    """
+
+    supports_batch = False
+
+    def history(self, ticker, start=None, end=None, period=None):
+        raise NotImplementedError
+
+    def history_many(self, tickers, start=None, end=None, period=None):
+        raise NotImplementedError
+
+
+class YahooProvider(PriceProvider):
+    """Proveedor que descarga los precios desde Yahoo Finance."""
+
+    supports_batch = True
+
+    def history(self, ticker, start=None, end=None, period=None):
+        import yfinance as yf
+
+        etf = yf.Ticker(ticker)
+        if start is not None:
+            return etf.history(start=start, end=end, timeout=FETCH_TIMEOUT)
+        return etf.history(period=period or "max", timeout=FETCH_TIMEOUT)
+
+    def history_many(self, tickers, start=None, end=None, period=None):
+        import yfinance as yf
+
+        dates = {"start": start, "end": end} if start is not None else {"period": period or "max"}
+        df = yf.download(
+            list(tickers), group_by="ticker", auto_adjust=True, actions=True,
+            threads=True, progress=False, timeout=FETCH_TIMEOUT, **dates
+        )
+        if not isinstance(df.columns, pd.MultiIndex):
+            return {tickers[0]: df} if len(tickers) == 1 else {}
+        available = set(df.columns.get_level_values(0))
+        return {ticker: df[ticker].dropna(how="all") for ticker in tickers if ticker in available}
+
+
+class OfflineProvider(PriceProvider):
+    """Proveedor sin red que sirve DataFrames precargados (útil para pruebas)."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def history(self, ticker, start=None, end=None, period=None):
+        self.calls.append((ticker, start, end, period))
+        df = _normalize_history(self.frames.get(ticker))
+        if df.empty:
+            return df
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df
+
+
+def period_start(period, today=None):
+    """Convierte un período de Yahoo ("1y", "6mo", "ytd", "max"...) en fecha inicial."""
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=today.year, month=1, day=1)
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"Período no soportado: {period}")
+    amount, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return today - pd.DateOffset(days=amount)
+    if unit == "wk":
+        return today - pd.DateOffset(weeks=amount)
+    if unit == "mo":
+        return today - pd.DateOffset(months=amount)
+    return today - pd.DateOffset(years=amount)
+
+
+def fetch_concurrently(provider, tickers, max_workers=MAX_WORKERS, timeout=FETCH_TIMEOUT,
+                       retries=FETCH_RETRIES, backoff=RETRY_BACKOFF, **dates):
+    """Descarga varios tickers con un pool de hilos acotado.
+
+    Cada ticker tiene `timeout` segundos desde que empieza su descarga y se
+    reintenta hasta `retries` veces con espera exponencial. Devuelve
+    `(frames, errors)`; los tickers que agotan los intentos solo aparecen
+    en `errors`.
+    """
+    frames, errors = {}, {}
+    remaining = list(tickers)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for attempt in range(retries + 1):
+            if not remaining:
+                break
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+            started = {}
+
+            def run(ticker):
+                started[ticker] = time.monotonic()
+                return provider.history(ticker, **dates)
+
+            futures = {executor.submit(run, ticker): ticker for ticker in remaining}
+            remaining = []
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker = futures[future]
+                    try:
+                        frames[ticker] = future.result()
+                        errors.pop(ticker, None)
+                    except Exception as e:
+                        errors[ticker] = e
+                        remaining.append(ticker)
+                now = time.monotonic()
+                for future in list(pending):
+                    ticker = futures[future]
+                    if ticker in started and now - started[ticker] > timeout:
+                        # El hilo no se puede interrumpir; solo se deja de esperar
+                        pending.discard(future)
+                        errors[ticker] = TimeoutError(f"Tiempo de espera agotado para {ticker}")
+                        remaining.append(ticker)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return frames, errors
+
+
+def _normalize_history(df):
+    """Deja el índice como fechas diarias sin zona horaria y solo las columnas conocidas."""
+    if df is None or df.empty or "Close" not in df.columns:
+        return pd.DataFrame()
+    df = df.reindex(columns=list(PRICE_COLUMNS)).copy()
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = "Date"
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+class PriceStore:
+    """Almacén SQLite con el histórico diario completo de cada ticker.
+
+    La primera consulta de un ticker descarga todo su histórico; las
+    siguientes solo piden al proveedor las barras posteriores a la última
+    guardada y el período solicitado se recorta localmente.
+    """
+
+    def __init__(self, path=PRICE_DB_PATH, provider=None, refresh_interval=REFRESH_INTERVAL):
+        self.path = path
+        self.provider = provider or YahooProvider()
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._ticker_locks = {}
+        self._create_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _create_schema(self):
+        columns = ", ".join(f"{column} REAL" for column in PRICE_COLUMNS.values())
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS prices (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    {columns},
+                    PRIMARY KEY (ticker, date)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_fetches (
+                    ticker TEXT PRIMARY KEY,
+                    last_fetch TIMESTAMP NOT NULL
+                )
+            """)
+
+    def last_fetch(self, ticker):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_fetch FROM price_fetches WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def last_date(self, ticker):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM prices WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def is_fresh(self, ticker, now=None):
+        last = self.last_fetch(ticker)
+        now = now or datetime.now()
+        return last is not None and now - last < self.refresh_interval
+
+    def write(self, ticker, df, replace=False, fetched_at=None):
+        """Guarda barras de un ticker; con `replace` borra antes su histórico."""
+        df = _normalize_history(df)
+        rows = [
+            (ticker, date.strftime("%Y-%m-%d"), *values)
+            for date, values in zip(df.index, df.itertuples(index=False, name=None))
+        ]
+        placeholders = ", ".join("?" * (len(PRICE_COLUMNS) + 2))
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM prices WHERE ticker = ?", (ticker,))
+            conn.executemany(f"INSERT OR REPLACE INTO prices VALUES ({placeholders})", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO price_fetches (ticker, last_fetch) VALUES (?, ?)",
+                (ticker, (fetched_at or datetime.now()).isoformat()),
+            )
+
+    def read(self, ticker, start=None, end=None):
+        """Lee del disco las barras de un ticker en el rango [start, end)."""
+        query = f"SELECT date, {', '.join(PRICE_COLUMNS.values())} FROM prices WHERE ticker = ?"
+        params = [ticker]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            query += " AND date < ?"
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        query += " ORDER BY date"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame([row[1:] for row in rows], columns=list(PRICE_COLUMNS), dtype="float64")
+        df.index = pd.DatetimeIndex([row[0] for row in rows], name="Date")
+        return df
+
+    @timed(name="PriceStore.fetch")
+    def fetch(self, tickers, **dates):
+        """Pide varios tickers al proveedor: en lote si lo admite y en paralelo los que el lote no trae."""
+        if not tickers:
+            return {}, {}
+        frames, pending = {}, list(tickers)
+        if self.provider.supports_batch:
+            try:
+                frames = self.provider.history_many(pending, **dates)
+            except Exception:
+                frames = {}
+            # Los tickers que el lote omite o devuelve vacíos se reintentan uno por uno
+            frames = {ticker: df for ticker, df in frames.items() if df is not None and not df.empty}
+            pending = [ticker for ticker in pending if ticker not in frames]
+        errors = {}
+        if pending:
+            retried, errors = fetch_concurrently(self.provider, pending, **dates)
+            frames.update(retried)
+        # yfinance no expone el tamaño de la respuesta: se cuenta el de los precios recibidos
+        if is_enabled():
+            record_bytes("PriceStore.fetch", sum(df.memory_usage(index=True).sum() for df in frames.values()))
+        return frames, errors
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker, threading.Lock())
+
+    def update_many(self, tickers, now=None):
+        """Trae del proveedor solo las barras que faltan de cada ticker.
+
+        Los tickers sin histórico se descargan completos en un lote y el resto
+        se agrupa por fecha de la última barra guardada, de modo que la
+        actualización diaria de todo el universo es una sola petición.
+        Devuelve un diccionario con los errores por ticker.
+
+        Solo se bloquean los tickers vencidos, cada uno con su propio candado:
+        una sesión cuyos tickers están al día no espera las descargas de
+        otra, y dos sesiones no descargan el mismo ticker a la vez.
+        """
+        stale = [ticker for ticker in dict.fromkeys(tickers) if not self.is_fresh(ticker, now)]
+        if not stale:
+            return {}
+        # En orden alfabético, para que dos sesiones con tickers en común no se bloqueen mutuamente
+        locks = [self._ticker_lock(ticker) for ticker in sorted(stale)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            # Otra sesión pudo actualizarlos mientras se esperaba el candado
+            return self._update_stale([ticker for ticker in stale if not self.is_fresh(ticker, now)], now)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _update_stale(self, stale, now):
+        """Actualiza `stale` (con sus candados ya tomados) y devuelve los errores por ticker."""
+        full, by_start = [], {}
+        for ticker in stale:
+            last = self.last_date(ticker)
+            if last is None:
+                full.append(ticker)
+            else:
+                by_start.setdefault(last, []).append(ticker)
+
+        errors = {}
+        for last, group in by_start.items():
+            # Se vuelve a pedir la última barra porque pudo guardarse antes del cierre
+            frames, failed = self.fetch(group, start=last.strftime("%Y-%m-%d"))
+            errors.update(failed)
+            for ticker in group:
+                if ticker in failed:
+                    continue
+                delta = _normalize_history(frames.get(ticker))
+                new_bars = delta[delta.index > last]
+                if not new_bars.empty and (new_bars["Dividends"].fillna(0).any() or new_bars["Stock Splits"].fillna(0).any()):
+                    # Un dividendo o split nuevo reajusta toda la serie histórica
+                    full.append(ticker)
+                else:
+                    self.write(ticker, delta, fetched_at=now)
+
+        frames, failed = self.fetch(full, period="max")
+        errors.update(failed)
+        for ticker in full:
+            if ticker in failed:
+                continue
+            history = _normalize_history(frames.get(ticker))
+            if history.empty:
+                # Una descarga vacía (yfinance a veces falla sin lanzar) no borra el histórico guardado
+                errors[ticker] = ValueError(f"El proveedor no devolvió datos para {ticker}")
+            else:
+                self.write(ticker, history, replace=True, fetched_at=now)
+        return errors
+
+    def update(self, ticker, now=None):
+        """Actualiza un solo ticker; lanza el error del proveedor si falla."""
+        errors = self.update_many([ticker], now)
+        if ticker in errors:
+            raise errors[ticker]
+
+    def get_history(self, ticker, period="max", start=None, end=None):
+        """Devuelve el histórico de un ticker para un período o rango de fechas."""
+        self.update(ticker)
+        if start is None:
+            start = period_start(period)
+        return self.read(ticker, start=start, end=end)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Devuelve el almacén de precios compartido por la aplicación."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
+
+
+def set_price_store(store):
+    """Reemplaza el almacén compartido (por ejemplo, por uno con `OfflineProvider`)."""
+    global _store
+    with _store_lock:
+        _store = store
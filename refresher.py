@@ -0,0 +1,225 @@
+"""Mantiene actualizada la caché compartida de precios de todo el universo de ETFs.
+
+Uso: python refresher.py [--once] [--force] [--at 16:30] [--timezone America/New_York]
+
+Después de cada cierre de mercado (con un retraso aleatorio para no
+coincidir con otros procesos) se traen del proveedor las barras nuevas de
+todos los ETFs del catálogo, se publican en la caché compartida
+(`market_cache`) y se recalculan las instantáneas de métricas. Las
+sesiones de la aplicación leen de esa caché sin esperar a la red.
+
+También puede ejecutarse dentro de la aplicación con `start_refresher`;
+el candado de la caché garantiza que, con varios procesos, solo uno
+actualice en cada cierre.
+"""
+import argparse
+import random
+import threading
+from datetime import date, datetime, time, timedelta
+
+from etf_catalog import PERIOD_MAPPING, etf_descriptions
+from market_cache import get_market_cache
+from metrics_snapshot import compute_snapshots, save_snapshots
+from price_store import PRICE_DB_PATH, PriceStore
+
+# Cierre del mercado estadounidense y margen para que el proveedor publique la barra final
+MARKET_TIMEZONE = "America/New_York"
+REFRESH_TIME = time(16, 30)
+
+# Retraso aleatorio máximo sobre la hora programada
+JITTER = timedelta(minutes=15)
+
+# Reintentos de los tickers que fallan: espera BACKOFF, 2·BACKOFF, 4·BACKOFF...
+RETRIES = 4
+BACKOFF = timedelta(minutes=2)
+
+# Si aun así quedan errores, la actualización completa se repite tras este intervalo
+RETRY_INTERVAL = timedelta(hours=1)
+
+# Tiempo tras la hora programada en que la versión anterior de la caché sigue siendo válida
+PUBLISH_GRACE = timedelta(hours=2)
+
+
+def market_timezone(name=MARKET_TIMEZONE):
+    """Zona horaria del mercado; sin la base de datos de zonas (Windows sin `tzdata`) se usa la local."""
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        return datetime.now().astimezone().tzinfo
+
+
+def last_scheduled(now=None, refresh_time=REFRESH_TIME, timezone=None):
+    """Última hora programada (día hábil a `refresh_time`) anterior o igual a `now`."""
+    timezone = timezone or market_timezone()
+    now = (now or datetime.now(timezone)).astimezone(timezone)
+    scheduled = datetime.combine(now.date(), refresh_time, timezone)
+    if scheduled > now:
+        scheduled -= timedelta(days=1)
+    while scheduled.weekday() >= 5:
+        scheduled -= timedelta(days=1)
+    return scheduled
+
+
+def next_scheduled(now=None, refresh_time=REFRESH_TIME, timezone=None):
+    """Siguiente hora programada (día hábil a `refresh_time`) estrictamente posterior a `now`."""
+    timezone = timezone or market_timezone()
+    now = (now or datetime.now(timezone)).astimezone(timezone)
+    scheduled = datetime.combine(now.date(), refresh_time, timezone)
+    while scheduled <= now or scheduled.weekday() >= 5:
+        scheduled += timedelta(days=1)
+    return scheduled
+
+
+def is_current(snapshot, now=None, grace=PUBLISH_GRACE):
+    """True si `snapshot` incluye el último cierre programado.
+
+    Las versiones que publica `RefreshScheduler` traen `valid_until` (su
+    siguiente hora programada más `grace`), así que se respeta el horario
+    con el que se publicaron aunque no sea el de por defecto. Sin ese dato
+    se usa `REFRESH_TIME`: durante `grace` después de cada hora programada
+    basta con el cierre anterior, para dar tiempo al programador a
+    publicar. Una versión más antigua indica que el programador no está
+    corriendo.
+    """
+    timezone = market_timezone()
+    now = (now or datetime.now(timezone)).astimezone(timezone)
+    if snapshot.valid_until is not None:
+        return now < snapshot.valid_until
+    scheduled = last_scheduled(now, timezone=timezone)
+    if now - scheduled < grace:
+        scheduled = last_scheduled(scheduled - timedelta(seconds=1), timezone=timezone)
+    return snapshot.published_at >= scheduled
+
+
+class RefreshScheduler:
+    """Programa y ejecuta las actualizaciones de la caché compartida.
+
+    Usa su propio `PriceStore` sin intervalo mínimo entre consultas, para
+    que la actualización programada siempre pida la barra de cierre aunque
+    una sesión haya consultado el mismo ticker durante el día.
+    """
+
+    def __init__(self, tickers=None, cache=None, store=None, refresh_time=REFRESH_TIME,
+                 timezone=MARKET_TIMEZONE, jitter=JITTER, retries=RETRIES, backoff=BACKOFF,
+                 snapshots=True, log=print):
+        self.tickers = list(tickers or etf_descriptions)
+        self.cache = cache or get_market_cache()
+        self.store = store or PriceStore(PRICE_DB_PATH, refresh_interval=timedelta(0))
+        self.refresh_time = refresh_time
+        self.timezone = market_timezone(timezone)
+        self.jitter = jitter
+        self.retries = retries
+        self.backoff = backoff
+        self.snapshots = snapshots
+        self.log = log
+        self._stop = threading.Event()
+
+    def last_scheduled(self, now=None):
+        """Última hora programada (día hábil a `refresh_time`) anterior o igual a `now`."""
+        return last_scheduled(now, self.refresh_time, self.timezone)
+
+    def next_run(self, now=None):
+        """Siguiente hora programada después de `now`, con un retraso aleatorio de hasta `jitter`."""
+        return next_scheduled(now, self.refresh_time, self.timezone) + self.jitter * random.random()
+
+    def needs_refresh(self, now=None):
+        """True si la caché no existe o se publicó antes del último cierre programado."""
+        snapshot = self.cache.snapshot()
+        return snapshot is None or snapshot.published_at < self.last_scheduled(now)
+
+    def refresh(self, force=False):
+        """Actualiza el almacén y publica una versión nueva de la caché.
+
+        Devuelve los errores que persisten tras los reintentos por ticker, o
+        None si no se actualizó (otro proceso tiene el candado o la caché ya
+        está al día).
+        """
+        with self.cache.lock() as acquired:
+            if not acquired or not (force or self.needs_refresh()):
+                return None
+            pending, errors = self.tickers, {}
+            for attempt in range(self.retries + 1):
+                errors = self.store.update_many(pending)
+                if not errors or attempt == self.retries:
+                    break
+                pending = list(errors)
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                self.log(f"{len(pending)} tickers con error; reintento en {delay.total_seconds():.0f} s.")
+                if self._stop.wait(delay.total_seconds()):
+                    return errors
+
+            # Los tickers que siguen fallando se publican con las barras que ya había
+            frames = {ticker: self.store.read(ticker) for ticker in self.tickers}
+            # Vigente hasta la siguiente hora programada de este horario, con el mismo margen que `is_current`
+            valid_until = next_scheduled(None, self.refresh_time, self.timezone) + PUBLISH_GRACE
+            version = self.cache.publish(frames, valid_until=valid_until)
+            self.log(f"Caché publicada ({version}): {sum(not df.empty for df in frames.values())} tickers.")
+            if self.snapshots:
+                today = date.today()
+                results, _ = compute_snapshots(self.tickers, list(PERIOD_MAPPING.values()), today)
+                save_snapshots(results, today)
+            for ticker, error in errors.items():
+                self.log(f"  Error al actualizar {ticker}: {error}")
+            return errors
+
+    def run(self):
+        """Actualiza si hace falta y luego después de cada cierre, hasta que se llame a `stop`."""
+        force = False
+        while not self._stop.is_set():
+            if force or self.needs_refresh():
+                try:
+                    errors = self.refresh(force=force)
+                except Exception as e:
+                    self.log(f"Error en la actualización programada: {e}")
+                    errors = {None: e}
+                if errors:
+                    # Con errores se repite antes del siguiente cierre, aunque ya se haya publicado
+                    force = True
+                    self._stop.wait((RETRY_INTERVAL * random.uniform(1.0, 1.5)).total_seconds())
+                    continue
+                force = False
+            run_at = self.next_run()
+            self.log(f"Próxima actualización: {run_at:%Y-%m-%d %H:%M %Z}.")
+            self._stop.wait(max((run_at - datetime.now(self.timezone)).total_seconds(), 0))
+
+    def stop(self):
+        self._stop.set()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher(**options):
+    """Inicia (una sola vez por proceso) el programador en un hilo de fondo."""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = RefreshScheduler(**options)
+            threading.Thread(target=_refresher.run, name="market-cache-refresher", daemon=True).start()
+        return _refresher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="Actualiza una vez y termina")
+    parser.add_argument("--force", action="store_true", help="Con --once, actualiza aunque la caché esté al día")
+    parser.add_argument("--at", default=REFRESH_TIME.strftime("%H:%M"), help="Hora de la actualización diaria (HH:MM)")
+    parser.add_argument("--timezone", default=MARKET_TIMEZONE, help="Zona horaria de --at")
+    parser.add_argument("--tickers", nargs="+", default=list(etf_descriptions), help="Tickers a mantener (por defecto, todos)")
+    args = parser.parse_args()
+
+    scheduler = RefreshScheduler(args.tickers, refresh_time=time.fromisoformat(args.at), timezone=args.timezone)
+    if args.once:
+        if scheduler.refresh(force=args.force) is None:
+            print("La caché ya está al día o la está actualizando otro proceso.")
+        return
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,47 @@
-import pandas as pd
 import hashlib
+import hmac
+import sqlite3
+from database import get_connection
+from instrumentation import timed
 
-# Cargar o crear archivo CSV de usuarios
+# Cargar la lista de usuarios: [{"username": ..., "password": ...}]
+@timed
 def load_users():
-    try:
-        return pd.read_csv("users.csv")
-    except FileNotFoundError:
-        # Crear un archivo vacío si no existe
-        df = pd.DataFrame(columns=["username", "password"])
-        df.to_csv("users.csv", index=False)
-        return df
+    with get_connection() as conn:
+        rows = conn.execute("SELECT username, password FROM users ORDER BY id").fetchall()
+    return [{"username": username, "password": password} for username, password in rows]
 
-# Guardar usuario en el archivo CSV
+# Guardar usuario; devuelve False si el nombre ya estaba registrado
+@timed
 def save_user(username, password_hash):
-    users = load_users()
-    new_user = pd.DataFrame({"username": [username], "password": [password_hash]})
-    users = pd.concat([users, new_user], ignore_index=True)
-    users.to_csv("users.csv", index=False)
+    try:
+        with get_connection() as conn, conn:
+            conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password_hash))
+        return True
+    except sqlite3.IntegrityError:
+        return False
 
 # Encriptar contraseñas
+@timed
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 # Autenticar usuario
+@timed
 def authenticate_user(username, password):
-    users = load_users()
-    password_hash = hash_password(password)
-    return not users[(users['username'] == username) & (users['password'] == password_hash)].empty
+    with get_connection() as conn:
+        row = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+    return row is not None and isinstance(row[0], str) and hmac.compare_digest(row[0], hash_password(password))
 
 # Verificar si el usuario ya existe
+@timed
 def user_exists(username):
-    users = load_users()
-    return username in users['username'].values
+    with get_connection() as conn:
+        return conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+# Obtener el id de un usuario (None si no existe)
+@timed
+def get_user_id(username):
+    with get_connection() as conn:
+        row = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+    return row[0] if row else None
@@ -0,0 +1,30 @@
+from database import get_connection
+
+DEFAULT_PORTFOLIO = "Principal"
+
+# Guardar (o reemplazar) una cartera con nombre en una sola transacción
+def save_portfolio(user_id, allocations, name=DEFAULT_PORTFOLIO):
+    rows = [(user_id, name, ticker, float(allocation)) for ticker, allocation in allocations.items() if allocation > 0]
+    with get_connection() as conn, conn:
+        conn.execute("DELETE FROM user_investments WHERE user_id = ? AND portfolio_name = ?", (user_id, name))
+        conn.executemany(
+            "INSERT INTO user_investments (user_id, portfolio_name, etf_ticker, allocation) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+# Cargar todas las carteras de un usuario: {nombre: {ticker: asignación}}
+def load_portfolios(user_id):
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT portfolio_name, etf_ticker, allocation FROM user_investments WHERE user_id = ? ORDER BY portfolio_name, id",
+            (user_id,),
+        ).fetchall()
+    portfolios = {}
+    for name, ticker, allocation in rows:
+        portfolios.setdefault(name, {})[ticker] = allocation
+    return portfolios
+
+# Eliminar una cartera
+def delete_portfolio(user_id, name):
+    with get_connection() as conn, conn:
+        conn.execute("DELETE FROM user_investments WHERE user_id = ? AND portfolio_name = ?", (user_id, name))
@@ -0,0 +1,127 @@
+"""Precarga los módulos pesados y los datos en caché antes de que llegue el tráfico.
+
+Uso: python warmup.py [--no-refresh]
+
+La página de inicio de sesión no importa NumPy, pandas, Matplotlib,
+seaborn, SciPy ni yfinance: se cargan con la primera sección que los
+necesita. Para que ese primer uso tampoco espere, `start_warmup` los
+importa en un hilo de fondo mientras el usuario inicia sesión y, si la
+caché compartida ya está publicada, construye las matrices por defecto.
+
+Ejecutado como script (por ejemplo, antes de `streamlit run`), compila el
+código del proyecto a bytecode, importa el grafo completo una vez (lo que
+también genera la caché de fuentes de Matplotlib en una instalación nueva)
+y actualiza la caché compartida de precios si está vencida.
+"""
+import argparse
+import importlib
+import os
+import threading
+import time
+
+# Módulos que solo necesitan las secciones de análisis, en orden de dependencia
+HEAVY_MODULES = (
+    "numpy", "pandas", "scipy.optimize", "matplotlib.figure", "seaborn", "yfinance",
+    "functionsappa", "refresher",
+)
+
+_thread = None
+_imported = threading.Event()
+_thread_lock = threading.Lock()
+
+
+def warm_imports(modules=HEAVY_MODULES):
+    """Importa `modules` y devuelve el tiempo de cada uno en segundos (0 si ya estaba cargado)."""
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def warm_data():
+    """Construye las matrices y covarianzas por defecto desde la caché compartida.
+
+    No hace nada si aún no hay una versión publicada, para no consultar la
+    red desde aquí: de eso se encarga `refresher`.
+    """
+    import functionsappa
+    from market_cache import get_market_cache
+
+    if get_market_cache().snapshot() is None:
+        return False
+    functionsappa.get_covariance_engine(252, "sample")
+    functionsappa.get_price_matrix(["FXI", "SPY"], period="1 año")
+    return True
+
+
+def _warm(imports, refresher):
+    try:
+        if imports:
+            warm_imports()
+        elif refresher:
+            importlib.import_module("refresher")
+    finally:
+        _imported.set()
+    if refresher:
+        from refresher import start_refresher
+        start_refresher()
+    if imports:
+        warm_data()
+
+
+def start_warmup(imports=None, refresher=None):
+    """Inicia (una sola vez por proceso) la precarga en un hilo de fondo.
+
+    Por defecto se desactiva con `ETF_PREWARM=0` y el programador de la
+    caché compartida con `ETF_REFRESHER=0` (por ejemplo, si `refresher.py`
+    corre como servicio aparte).
+    """
+    global _thread
+    if imports is None:
+        imports = os.environ.get("ETF_PREWARM", "1") != "0"
+    if refresher is None:
+        refresher = os.environ.get("ETF_REFRESHER", "1") != "0"
+    with _thread_lock:
+        if _thread is not None or not (imports or refresher):
+            return
+        _thread = threading.Thread(target=_warm, args=(imports, refresher), name="warmup", daemon=True)
+        _thread.start()
+
+
+def wait_for_imports(timeout=None):
+    """Espera a que el hilo de precarga termine de importar, si está en curso.
+
+    Así la sesión no importa los mismos módulos a la vez que el hilo.
+    """
+    if _thread is not None:
+        _imported.wait(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-refresh", action="store_true", help="No actualizar la caché compartida de precios")
+    args = parser.parse_args()
+
+    # Fuera de `streamlit run` las cachés funcionan, pero avisan en cada llamada
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    import compileall
+    start = time.perf_counter()
+    compileall.compile_dir(os.path.dirname(os.path.abspath(__file__)), quiet=1)
+    print(f"Bytecode del proyecto: {(time.perf_counter() - start) * 1000:,.0f} ms")
+
+    for name, seconds in warm_imports().items():
+        print(f"import {name:<20} {seconds * 1000:>8,.0f} ms")
+
+    if not args.no_refresh:
+        from refresher import RefreshScheduler
+        errors = RefreshScheduler().refresh()
+        if errors is None:
+            print("La caché compartida ya está al día.")
+
+
+if __name__ == "__main__":
+    main()